@@ -4,12 +4,45 @@ bl_info = {
     "category": "Object",
 }
 #******************************************************************************
+import json
+import os
+import queue
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
 import bpy
 import bmesh
-import mathutils
 
 from bpy.app.handlers import persistent 
-from mathutils import Vector, Matrix
+#******************************************************************************
+# Startup registers the menu, the operator, the handlers and the msgbus
+# subscriptions. The modules Blender has not loaded yet come with the first
+# operator call; both times are kept in timings and printed once
+np=None
+centroid_rl=None
+subprocess=None
+ThreadPoolExecutor=None
+timings={}
+
+def LoadModules():
+    global np,centroid_rl,subprocess,ThreadPoolExecutor
+    if(np is not None): return
+    # centroid_rl.py sits next to this file and is shared with quick_menu_rl.py
+    folder=os.path.dirname(os.path.abspath(__file__))
+    if(folder not in sys.path): sys.path.append(folder)
+    import centroid_rl
+    import numpy as np
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+
+def ReportTimings():
+    print("QuickMenu: register %.1f ms, first use %.1f ms"%(timings.get("register",0.0),timings.get("first_use",0.0)))
 #******************************************************************************
 def mag(array):
     return (array[0] ** 2 + array[1] ** 2) ** 0.5
@@ -27,23 +60,842 @@ def AlignX(vertices,index):
         if(vert.index==index[0] or vert.index==index[1]):
             vert.select=True
     bpy.ops.uv.align(axis='ALIGN_X')
+
+def MeshObjects():
+    # Edit Mode: every object being edited; Object Mode: the selected meshes
+    objects=bpy.context.objects_in_mode if bpy.context.mode=='EDIT_MESH' else bpy.context.selected_objects
+    return [o for o in objects if o.type=='MESH']
+
+#*****************************************************************************************
+# UV buffer: a whole UV layer of a mesh in flat NumPy arrays, one foreach_get
+# per attribute, written back with a single foreach_set
+class UVBuffer:
+    def __init__(self, obj):
+        if(obj.mode=='EDIT'): obj.update_from_editmode()
+        mesh=obj.data
+        if(len(mesh.uv_layers)==0): mesh.uv_layers.new()
+        self.obj=obj
+        self.mesh=mesh
+        self.layerName=mesh.uv_layers.active.name
+
+        loopCount=len(mesh.loops)
+        faceCount=len(mesh.polygons)
+        self.uv=np.empty(loopCount*2,dtype=np.float32)
+        mesh.uv_layers[self.layerName].data.foreach_get("uv",self.uv)
+        self.uv=self.uv.reshape(-1,2)
+        self.vertOfLoop=np.empty(loopCount,dtype=np.intc)
+        mesh.loops.foreach_get("vertex_index",self.vertOfLoop)
+        self.loopStart=np.empty(faceCount,dtype=np.intc)
+        mesh.polygons.foreach_get("loop_start",self.loopStart)
+        self.loopTotal=np.empty(faceCount,dtype=np.intc)
+        mesh.polygons.foreach_get("loop_total",self.loopTotal)
+        self.faceSelect=np.empty(faceCount,dtype=bool)
+        mesh.polygons.foreach_get("select",self.faceSelect)
+        # Loops of a face are contiguous and faces are in loop_start order
+        self.faceOfLoop=np.repeat(np.arange(faceCount),self.loopTotal)
+
+    def Write(self):
+        mesh=self.mesh
+        mesh.uv_layers[self.layerName].data.foreach_set("uv",self.uv.ravel())
+        if(self.obj.mode=='EDIT'):
+            # Reload the edit BMesh from the mesh instead of leaving Edit Mode
+            bm=bmesh.from_edit_mesh(mesh)
+            bm.clear()
+            bm.from_mesh(mesh)
+            bmesh.update_edit_mesh(mesh)
+        else:
+            mesh.update()
+
+    def LoopSelect(self):
+        # Loops of the selected faces
+        return self.faceSelect[self.faceOfLoop]
+
+    def Scale(self,factor,pivot=(0.0,0.0),mask=None):
+        pivot=np.asarray(pivot,dtype=np.float32)
+        if(mask is None): self.uv=(pivot+(self.uv-pivot)*factor).astype(np.float32)
+        else: self.uv[mask]=pivot+(self.uv[mask]-pivot)*factor
+
+    def Translate(self,offset,mask=None):
+        offset=np.asarray(offset,dtype=np.float32)
+        if(mask is None): self.uv+=offset
+        else: self.uv[mask]+=offset
+
+    def Align(self,axis,value,mask):
+        # axis 0 = U (ALIGN_X), 1 = V (ALIGN_Y)
+        self.uv[mask,axis]=value
+
+    def ScaleIslands(self,island,factor,mask=None):
+        # Per-island scale about each island's mean UV; factor has one value per island
+        islandOfLoop=island[self.faceOfLoop]
+        count=len(factor)
+        loops=np.bincount(islandOfLoop,minlength=count)
+        center=np.stack([np.bincount(islandOfLoop,weights=self.uv[:,axis],minlength=count) for axis in range(2)],axis=1)/np.maximum(loops,1)[:,None]
+        loopCenter=center[islandOfLoop]
+        scaled=(loopCenter+(self.uv-loopCenter)*factor[islandOfLoop][:,None]).astype(np.float32)
+        if(mask is None): self.uv=scaled
+        else: self.uv[mask]=scaled[mask]
+
+    def Islands(self):
+        # Faces that share a vertex with the same UV are in the same island.
+        # Connected components by min-label propagation with pointer jumping
+        if(len(self.loopStart)==0): return np.zeros(0,dtype=np.intp)
+        uvKey=np.round(self.uv*100000.0).astype(np.int64)
+        keys=np.stack((self.vertOfLoop.astype(np.int64),uvKey[:,0],uvKey[:,1]),axis=1)
+        group=np.unique(keys,axis=0,return_inverse=True)[1].ravel()
+        order=np.argsort(group,kind='stable')
+        sortedGroup=group[order]
+        starts=np.flatnonzero(np.r_[True,sortedGroup[1:]!=sortedGroup[:-1]])
+        sizes=np.diff(np.r_[starts,len(group)])
+
+        label=np.arange(len(self.loopStart))
+        while True:
+            groupMin=np.minimum.reduceat(label[self.faceOfLoop][order],starts)
+            loopMin=np.empty(len(group),dtype=label.dtype)
+            loopMin[order]=np.repeat(groupMin,sizes)
+            new=np.minimum(label,np.minimum.reduceat(loopMin,self.loopStart))
+            while True:
+                jumped=new[new]
+                if(np.array_equal(jumped,new)): break
+                new=jumped
+            if(np.array_equal(new,label)): break
+            label=new
+        return np.unique(label,return_inverse=True)[1].ravel()
+
+    def FaceAreas(self):
+        # World-space area and UV area of every face, by a fan around its first loop
+        mesh=self.mesh
+        co=np.empty(len(mesh.vertices)*3,dtype=np.float32)
+        mesh.vertices.foreach_get("co",co)
+        matrix=np.array(self.obj.matrix_world,dtype=np.float64)
+        world=co.reshape(-1,3)@matrix[:3,:3].T+matrix[:3,3]
+
+        nextLoop=np.arange(len(self.uv))+1
+        nextLoop[self.loopStart+self.loopTotal-1]=self.loopStart
+        first=self.loopStart[self.faceOfLoop]
+
+        points=world[self.vertOfLoop]
+        cross=np.cross(points-points[first],points[nextLoop]-points[first])
+        worldArea=0.5*np.linalg.norm(np.add.reduceat(cross,self.loopStart,axis=0),axis=1)
+
+        a=self.uv-self.uv[first]
+        b=self.uv[nextLoop]-self.uv[first]
+        uvArea=0.5*np.abs(np.add.reduceat(a[:,0]*b[:,1]-a[:,1]*b[:,0],self.loopStart))
+        return worldArea,uvArea
+
+#*****************************************************************************************
+# Texel density: UV units per meter, sqrt(UV area / world area), per island
+def IslandDensity(buffer):
+    island=buffer.Islands()
+    worldArea,uvArea=buffer.FaceAreas()
+    worldSum=np.bincount(island,weights=worldArea)
+    uvSum=np.bincount(island,weights=uvArea)
+    density=np.sqrt(uvSum/np.maximum(worldSum,1e-12))
+    return island,density,worldSum,uvSum
+
+def SetTexelDensity(buffer,target):
+    # Scale each island about its UV center to the target density. Only islands
+    # with selected faces change, or all of them if nothing is selected
+    island,density,worldSum,uvSum=IslandDensity(buffer)
+    touched=np.bincount(island,weights=buffer.faceSelect,minlength=len(density))>0
+    if(not touched.any()): touched[:]=True
+
+    factor=np.where(touched&(density>0.0),target/np.maximum(density,1e-12),1.0)
+    buffer.ScaleIslands(island,factor)
+    return int(touched.sum())
+
+def ReportTexelDensity(operator,buffers,textureSize,limit=10):
+    # One line per mesh, at most limit lines
+    for buffer in buffers[:limit]:
+        island,density,worldSum,uvSum=IslandDensity(buffer)
+        total=np.sqrt(uvSum.sum()/max(worldSum.sum(),1e-12))*textureSize
+        pixels=density*textureSize
+        operator.report({'INFO'},"%s: %.1f px/m, %d islands (%.1f - %.1f px/m)"%(buffer.obj.name,total,len(density),pixels.min(),pixels.max()))
+    if(len(buffers)>limit): operator.report({'INFO'},"... and %d more meshes"%(len(buffers)-limit))
+    if(len(buffers)==0): operator.report({'WARNING'},"No selected mesh has faces with UVs")
+
+def UVBuffers(objects,create=True):
+    # One buffer per mesh: linked duplicates share their UVs. Meshes without
+    # faces are skipped, and so are meshes without UVs unless create adds a layer
+    buffers={}
+    for o in objects:
+        mesh=o.data
+        if(mesh.as_pointer() in buffers or len(mesh.polygons)==0): continue
+        if(not create and len(mesh.uv_layers)==0): continue
+        buffers[mesh.as_pointer()]=UVBuffer(o)
+    return list(buffers.values())
+
+#*****************************************************************************************
+# UV modes on the buffer
+def SizeFromCube(objects,target):
+    for buffer in UVBuffers(objects):
+        SetTexelDensity(buffer,target)
+        buffer.Write()
+
+def FirstEdgeLength(buffer,face):
+    start=buffer.loopStart[face]
+    return mag(buffer.uv[start]-buffer.uv[start+1])
+
+def PackIslandSameSize(objects):
+    # pack_islands scales every island by the same factor: measure it on the
+    # first selected face of the active object and undo it on the selected faces
+    active=bpy.context.active_object
+    if(active is None or active.type!='MESH' or len(active.data.polygons)==0): return
+    buffer=UVBuffer(active)
+    selected=np.flatnonzero(buffer.faceSelect)
+    face=selected[0] if len(selected)>0 else 0
+    distance_01=FirstEdgeLength(buffer,face)
+
+    bpy.ops.uv.pack_islands(rotate=False,margin=0.01)
+
+    distance_02=FirstEdgeLength(UVBuffer(active),face)
+    if(distance_02==0.0): return
+    percentage=distance_01/distance_02
+    for buffer in UVBuffers(objects):
+        buffer.Scale(percentage,mask=buffer.LoopSelect())
+        buffer.Write()
+
+def SeedFace(buffer):
+    # The active face if it is selected, otherwise the last selected face
+    selected=np.flatnonzero(buffer.faceSelect)
+    if(len(selected)==0): return None
+    active=buffer.mesh.polygons.active
+    return active if active>=0 and buffer.faceSelect[active] else int(selected[-1])
+
+def AlignQuad(buffer,face):
+    # Straightens the seed quad in the UV layer: the two highest corners get
+    # their mean V, then the two lowest, then the two leftmost and the two
+    # rightmost get their mean U, like uv.align on each pair. Loops of the same
+    # vertex with the same UV (the rest of the island) move along
+    loops=np.arange(buffer.loopStart[face],buffer.loopStart[face]+buffer.loopTotal[face])
+    for axis,sign in ((1,-1.0),(1,1.0),(0,1.0),(0,-1.0)):
+        pair=loops[np.argsort(sign*buffer.uv[loops,axis],kind='stable')[:2]]
+        value=buffer.uv[pair,axis].mean()
+        mask=np.zeros(len(buffer.uv),dtype=bool)
+        for loop in pair:
+            mask|=(buffer.vertOfLoop==buffer.vertOfLoop[loop])&np.all(buffer.uv==buffer.uv[loop],axis=1)
+        buffer.Align(axis,value,mask)
+
+def AutoSelectedQuads():
+    obj=bpy.context.active_object
+    buffer=UVBuffer(obj)
+    face=SeedFace(buffer)
+    if(face is None): return
+    AlignQuad(buffer,face)
+    buffer.Write()
+
+    # Re-select the seed face and make it active for follow_active_quads
+    bm=bmesh.from_edit_mesh(obj.data)
+    bm.faces.ensure_lookup_table()
+    seed=bm.faces[face]
+    seed.select_set(True)
+    bm.faces.active=seed
+    bmesh.update_edit_mesh(obj.data,loop_triangles=False,destructive=False)
+
+    bpy.ops.uv.select_linked()
+    bpy.ops.uv.follow_active_quads()
+
+#*****************************************************************************************
+# Legacy UV modes, kept to compare against the buffer versions (compareLegacy)
+def LegacySizeFromCube():
+    obj=bpy.context.active_object
+    cube_size=2
+    cube_uv_size=0.25
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.ops.mesh.primitive_cube_add(size=cube_size)
+    obj_cube=bpy.context.active_object
+    obj.select_set(True)
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    bpy.ops.uv.average_islands_scale()
+
+    bm=bmesh.from_edit_mesh(obj_cube.data)
+    uv_layer=bm.loops.layers.uv.verify()
+    bm.faces.ensure_lookup_table()
+    pos_01=bm.faces[0].loops[0][uv_layer].uv
+    pos_02=bm.faces[0].loops[1][uv_layer].uv
+    distance=mag(pos_01-pos_02)
+
+    percentage=((cube_uv_size*100)/distance)/100
+    for o in bpy.context.selected_objects:
+        bm=bmesh.from_edit_mesh(o.data)
+        uv_layer=bm.loops.layers.uv.verify()
+        for f in bm.faces:
+            for l in f.loops:
+                l[uv_layer].uv*=percentage
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.data.objects.remove(obj_cube,do_unlink=True)
+    bpy.context.view_layer.objects.active=obj
+    bpy.ops.object.mode_set(mode='EDIT')
+
+def LegacyPackIslandSameSize():
+    obj=bpy.context.active_object
+    bm=bmesh.from_edit_mesh(obj.data)
+    uv_layer=bm.loops.layers.uv.verify()
+
+    face_index=0
+    for f in bm.faces:
+        if(f.select==True):
+            face_index=f.index
+            break
+
+    bm.faces.ensure_lookup_table()
+    pos_01=bm.faces[face_index].loops[0][uv_layer].uv
+    pos_02=bm.faces[face_index].loops[1][uv_layer].uv
+    distance_01=mag(pos_01-pos_02)
+
+    bpy.ops.uv.pack_islands(rotate=False,margin=0.01)
+
+    pos_01=bm.faces[face_index].loops[0][uv_layer].uv
+    pos_02=bm.faces[face_index].loops[1][uv_layer].uv
+    distance_02=mag(pos_01-pos_02)
+
+    percentage=((distance_01*100)/distance_02)/100
+
+    for f in bm.faces:
+        if(f.select==True):
+            for l in f.loops:
+                l[uv_layer].uv*=percentage
+
+def LegacyAutoSelectedQuads():
+    top_01=[-1,0]
+    top_02=[-1,0]
+    down_01=[-1,1]
+    down_02=[-1,1]
+    left_01=[-1,1]
+    left_02=[-1,1]
+    right_01=[-1,0]
+    right_02=[-1,0]
+    face_index=0
+
+    obj=bpy.context.active_object
+    bm=bmesh.from_edit_mesh(obj.data)
+    uv_layer=bm.loops.layers.uv.verify()
+    for face in bm.faces:
+        if(face.select):
+            face_index=face.index
+            for loop in face.loops:
+                if(loop[uv_layer].uv[1]>top_02[1]):
+                    top_02=[loop.vert.index,loop[uv_layer].uv[1]]
+                    if(top_02[1]>top_01[1]):
+                        temp_top=top_01
+                        top_01=top_02
+                        top_02=temp_top
+                if(loop[uv_layer].uv[1]<down_02[1]):
+                    down_02=[loop.vert.index,loop[uv_layer].uv[1]]
+                    if(down_02[1]<down_01[1]):
+                        temp_down=down_01
+                        down_01=down_02
+                        down_02=temp_down
+                if(loop[uv_layer].uv[0]<left_02[1]):
+                    left_02=[loop.vert.index,loop[uv_layer].uv[0]]
+                    if(left_02[1]<left_01[1]):
+                        temp_left=left_01
+                        left_01=left_02
+                        left_02=temp_left
+                if(loop[uv_layer].uv[0]>right_02[1]):
+                    right_02=[loop.vert.index,loop[uv_layer].uv[0]]
+                    if(right_02[1]>right_01[1]):
+                        temp_right=right_01
+                        right_01=right_02
+                        right_02=temp_right
+
+    bpy.ops.mesh.select_mode(type="VERT")
+    vertices=[v for v in bm.verts]
+    AlignY(vertices,[top_01[0],top_02[0]])
+    AlignY(vertices,[down_01[0],down_02[0]])
+    AlignX(vertices,[left_01[0],left_02[0]])
+    AlignX(vertices,[right_01[0],right_02[0]])
+
+    bpy.ops.mesh.select_mode(type="FACE")
+    for face in bm.faces:
+        if(face.index==face):
+            face.select=True
+            break
+    bpy.ops.uv.select_linked()
+    bpy.ops.uv.follow_active_quads()
+
+def RunUVMode(operator,objects,newPath,legacyPath):
+    # With compareLegacy the legacy path runs first on the same UVs, then the
+    # original UVs are restored and the new path runs; the largest per-loop
+    # difference is reported for each mesh
+    if(not operator.compareLegacy):
+        newPath()
+        return
+    before=UVBuffers(objects)
+    legacyPath()
+    legacy=[UVBuffer(buffer.obj).uv for buffer in before]
+    for buffer in before: buffer.Write()
+    newPath()
+    for buffer,old in zip(before,legacy):
+        new=UVBuffer(buffer.obj).uv
+        difference=float(np.abs(new-old).max()) if len(new)>0 else 0.0
+        operator.report({'INFO'},"%s: legacy vs buffer, max UV difference %.6f"%(buffer.obj.name,difference))
+
+#*****************************************************************************************
+# Texture export: pixels are read with one foreach_get into a float32 buffer on
+# the main thread; encoding and writing happen on a worker thread
+exportPool=None
+exportJobs=[]
+
+def SRGB(linear):
+    return np.where(linear<=0.0031308,linear*12.92,1.055*np.power(np.maximum(linear,0.0031308),1.0/2.4)-0.055)
+
+def PNGChunk(tag,body):
+    return struct.pack(">I",len(body))+tag+body+struct.pack(">I",zlib.crc32(tag+body)&0xffffffff)
+
+def EncodePNG(rows,bits):
+    # rows: (height, width, channels) in 0..1, top row first
+    height,width,channels=rows.shape
+    if(bits==16): data=(rows*65535.0+0.5).astype(">u2")
+    else: data=(rows*255.0+0.5).astype(np.uint8)
+    raw=np.zeros((height,1+width*channels*(bits//8)),dtype=np.uint8)
+    raw[:,1:]=data.reshape(height,-1).view(np.uint8)
+    header=struct.pack(">IIBBBBB",width,height,bits,{1:0,2:4,3:2,4:6}[channels],0,0,0)
+    return b"\x89PNG\r\n\x1a\n"+PNGChunk(b"IHDR",header)+PNGChunk(b"IDAT",zlib.compress(raw.tobytes(),6))+PNGChunk(b"IEND",b"")
+
+def EncodeTGA(rows):
+    # Uncompressed 32-bit BGRA, bottom row first
+    height,width,channels=rows.shape
+    rgba=np.ones((height,width,4),dtype=np.float32)
+    rgba[:,:,:3]=rows[:,:,:3] if channels>=3 else rows[:,:,:1]
+    if(channels in (2,4)): rgba[:,:,3]=rows[:,:,-1]
+    data=(np.flipud(rgba)[:,:,[2,1,0,3]]*255.0+0.5).astype(np.uint8)
+    header=struct.pack("<BBBHHBHHHHBB",0,0,2,0,0,0,0,0,width,height,32,8)
+    return header+data.tobytes()
+
+def WriteImage(pixels,width,height,channels,toSRGB,path,fileFormat):
+    # Runs on the worker thread: NumPy, zlib and file IO only, no bpy
+    rows=np.flipud(pixels.reshape(height,width,channels))
+    if(toSRGB):
+        rows=rows.copy()
+        rows[:,:,:3]=SRGB(rows[:,:,:3])
+    rows=np.clip(rows,0.0,1.0)
+    data=EncodeTGA(rows) if fileFormat=='TGA' else EncodePNG(rows,16 if fileFormat=='PNG16' else 8)
+    folder=os.path.dirname(path)
+    if(folder): os.makedirs(folder,exist_ok=True)
+    with open(path,"wb") as f: f.write(data)
+    return path
+
+def ExportPath(pattern,image,index,count,fileFormat):
+    # {name} and {index} are replaced; several images without a placeholder get _<name>
+    if(count>1 and "{" not in pattern): pattern+="_{name}"
+    name=bpy.path.clean_name(image.name)
+    path=bpy.path.abspath(pattern.format(name=name,index=index))
+    extension=".tga" if fileFormat=='TGA' else ".png"
+    return path if path.lower().endswith(extension) else path+extension
+
+def ExportImages(operator,images,pattern,fileFormat):
+    global exportPool
+    if(exportPool is None): exportPool=ThreadPoolExecutor(max_workers=max(1,min(4,os.cpu_count() or 1)))
+    queued=0
+    for index,image in enumerate(images):
+        width,height=image.size
+        channels=image.channels
+        if(width*height==0 or len(image.pixels)==0):
+            operator.report({'WARNING'},"%s has no pixel buffer to export"%image.name)
+            continue
+        pixels=np.empty(width*height*channels,dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        toSRGB=image.is_float and image.colorspace_settings.name not in ("Non-Color","Raw")
+        path=ExportPath(pattern,image,index,len(images),fileFormat)
+        exportJobs.append((image.name,exportPool.submit(WriteImage,pixels,width,height,channels,toSRGB,path,fileFormat)))
+        queued+=1
+    if(queued>0 and not bpy.app.timers.is_registered(CollectExports)): bpy.app.timers.register(CollectExports,first_interval=0.2)
+    operator.report({'INFO'},"%d images queued for export"%queued)
+
+def CollectExports():
+    # Reports finished exports on the main thread; stops once nothing is pending
+    for job in [job for job in exportJobs if job[1].done()]:
+        exportJobs.remove(job)
+        name,future=job
+        error=future.exception()
+        if(error is None): print("Exported %s to %s"%(name,future.result()))
+        else: print("Export of %s failed: %s"%(name,error))
+    return 0.2 if len(exportJobs)>0 else None
+
+def EditorImages():
+    images=[]
+    for area in bpy.context.screen.areas:
+        if(area.type=='IMAGE_EDITOR'):
+            image=area.spaces.active.image
+            if(image is not None and image not in images): images.append(image)
+    return images
+
+#*****************************************************************************************
+# Material presets: the name -> material index is built once and dropped when
+# materials change; the slots a preset replaces are kept per mesh so that
+# "Restore Materials" is a single pass over the slots
+materialIndex=None
+materialSnapshot={}
+
+materialPresets={
+    "Auto": lambda slot: "Material_"+str(slot+1).zfill(2),
+    "Occlusion": lambda slot: "Material_Occlusion",
+}
+
+def InvalidateMaterialIndex():
+    global materialIndex
+    materialIndex=None
+
+def FindMaterial(name):
+    global materialIndex
+    if(materialIndex is None or materialIndex[0]!=len(bpy.data.materials)):
+        materialIndex=(len(bpy.data.materials),{m.name:m for m in bpy.data.materials})
+    material=materialIndex[1].get(name)
+    if(material is not None and material.name!=name):
+        # Renamed since the index was built
+        InvalidateMaterialIndex()
+        return FindMaterial(name)
+    return material
+
+def MaterialMeshes(objects):
+    # Meshes (or curves) of the objects, each shared datablock once
+    meshes={}
+    for o in objects:
+        data=o.data
+        if(data is not None and hasattr(data,"materials") and data.as_pointer() not in meshes): meshes[data.as_pointer()]=data
+    return list(meshes.values())
+
+def ApplyMaterialPreset(operator,objects,preset):
+    missing=set()
+    meshes=MaterialMeshes(objects)
+    for mesh in meshes:
+        materials=mesh.materials
+        if(mesh.name not in materialSnapshot):
+            materialSnapshot[mesh.name]=tuple(m.name if m else None for m in materials)
+        for slot in range(len(materials)):
+            name=materialPresets[preset](slot)
+            material=FindMaterial(name)
+            if(material is None): missing.add(name)
+            else: materials[slot]=material
+    ReportMissingMaterials(operator,missing)
+    operator.report({'INFO'},"%s materials set on %d meshes"%(preset,len(meshes)))
+
+def RestoreMaterials(operator,objects):
+    missing=set()
+    restored=0
+    for mesh in MaterialMeshes(objects):
+        names=materialSnapshot.pop(mesh.name,None)
+        if(names is None): continue
+        materials=mesh.materials
+        for slot,name in enumerate(names[:len(materials)]):
+            material=FindMaterial(name) if name else None
+            if(name and material is None): missing.add(name)
+            else: materials[slot]=material
+        restored+=1
+    ReportMissingMaterials(operator,missing)
+    operator.report({'INFO'},"Materials restored on %d meshes"%restored)
+
+def ReportMissingMaterials(operator,missing):
+    if(len(missing)>0): operator.report({'WARNING'},"Missing materials: "+", ".join(sorted(missing)))
+
+#*****************************************************************************************
+# AO bake pool: each selected object, or each group of objects sharing a target
+# image, is written to a temporary .blend and baked by a "blender --background"
+# worker on CPU Cycles. The other visible meshes go along unselected, so they
+# still occlude as in the synchronous bake. The scene bake and Cycles settings
+# travel with each job; Cycles' "Sample n/m" lines are read back into the
+# progress bar and status text
+bakeScheduler=None
+bakeSampleLine=re.compile(r"Sample (\d+)/(\d+)")
+
+BAKE_WORKER_SCRIPT='''
+import bpy, json, sys
+job=json.loads(sys.argv[sys.argv.index("--")+1])
+scene=bpy.context.scene
+scene.render.engine='CYCLES'
+for name,value in job["cycles"].items():
+    try: setattr(scene.cycles,name,value)
+    except (AttributeError,TypeError,ValueError): pass
+scene.cycles.device='CPU'
+for name,value in job["bake"].items():
+    try: setattr(scene.render.bake,name,value)
+    except (AttributeError,TypeError,ValueError): pass
+if job["world"] in bpy.data.worlds: scene.world=bpy.data.worlds[job["world"]]
+objects=[bpy.data.objects[name] for name in job["objects"]]
+for o in objects:
+    if o.name not in scene.collection.objects: scene.collection.objects.link(o)
+for name in job["occluders"]:
+    o=bpy.data.objects[name]
+    if o.name not in scene.collection.objects: scene.collection.objects.link(o)
+    o.select_set(False)
+for o in objects: o.select_set(True)
+bpy.context.view_layer.objects.active=objects[0]
+bpy.ops.object.bake(type="AO")
+for name,path in job["images"].items():
+    image=bpy.data.images[name]
+    image.filepath_raw=path
+    image.file_format="OPEN_EXR" if path.endswith(".exr") else "PNG"
+    image.save()
+'''
+
+def BakeTargetImages(obj):
+    # Bake writes into the active Image Texture node of every material of the object
+    images=set()
+    for slot in obj.material_slots:
+        material=slot.material
+        if(material is None or not material.use_nodes): continue
+        node=material.node_tree.nodes.active
+        if(node is not None and node.type=='TEX_IMAGE' and node.image is not None): images.add(node.image)
+    return images
+
+def PlainSettings(struct):
+    # Editable bool/int/float/enum/string values of an RNA struct, for the job JSON
+    values={}
+    for prop in struct.bl_rna.properties:
+        if(prop.is_readonly or prop.type not in {'BOOLEAN','INT','FLOAT','ENUM','STRING'}): continue
+        value=getattr(struct,prop.identifier)
+        if(prop.type=='ENUM' and prop.is_enum_flag): value=list(value)
+        elif(prop.type in {'BOOLEAN','INT','FLOAT'} and getattr(prop,"array_length",0)>0): value=list(value)
+        values[prop.identifier]=value
+    return values
+
+def BakeParallelSupported(scene):
+    # The pool bakes each group onto itself into image textures; selected to
+    # active (cage, extrusion, ray distance) and vertex color targets need the
+    # whole selection in one bake, so those stay on the synchronous bake
+    bake=scene.render.bake
+    return not bake.use_selected_to_active and getattr(bake,"target",'IMAGE_TEXTURES')=='IMAGE_TEXTURES'
+
+def BakeGroups(objects):
+    # Objects that share a target image are baked together by the same worker
+    groups=[]
+    for obj in objects:
+        images=BakeTargetImages(obj)
+        if(len(images)==0): continue
+        merged=[group for group in groups if group[1]&images]
+        for group in merged: groups.remove(group)
+        groups.append(([o for group in merged for o in group[0]]+[obj],set().union(images,*[group[1] for group in merged])))
+    return groups
+
+class BakeScheduler:
+    def __init__(self,groups,workers):
+        scene=bpy.context.scene
+        self.folder=tempfile.mkdtemp(prefix="quickmenu_bake_")
+        self.pending=[]
+        self.running=[]
+        self.lines=queue.Queue()
+        self.total=len(groups)
+        self.finished=0
+        self.failed=[]
+        self.fractions={}
+        self.workers=workers
+        self.threads=max(1,(os.cpu_count() or 1)//workers)
+        world=scene.world
+        # Every rendered mesh of the view layer, the other groups included, shades the bake
+        visible=[o for o in bpy.context.view_layer.objects if o.type=='MESH' and o.visible_get() and not o.hide_render]
+        for index,(objects,images) in enumerate(groups):
+            path=os.path.join(self.folder,"job_%d.blend"%index)
+            occluders=[o for o in visible if o not in objects]
+            bpy.data.libraries.write(path,set(objects)|set(occluders)|({world} if world else set()),fake_user=True,path_remap='ABSOLUTE')
+            job={
+                "objects":[o.name for o in objects],
+                "occluders":[o.name for o in occluders],
+                "images":{image.name:os.path.join(self.folder,"job_%d_%d.%s"%(index,i,"exr" if image.is_float else "png")) for i,image in enumerate(images)},
+                "cycles":PlainSettings(scene.cycles) if hasattr(scene,"cycles") else {},
+                "bake":PlainSettings(scene.render.bake),
+                "world":world.name if world else "",
+            }
+            self.pending.append((index,path,job))
+
+    def Start(self,index,path,job):
+        command=[bpy.app.binary_path,"--background","--factory-startup","--threads",str(self.threads),path,
+                 "--python-exit-code","1","--python-expr",BAKE_WORKER_SCRIPT,"--",json.dumps(job)]
+        try:
+            process=subprocess.Popen(command,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,text=True)
+        except (OSError,ValueError,subprocess.SubprocessError):
+            # The worker could not start: the job failed, the others go on
+            self.failed.append(index)
+            self.finished+=1
+            return
+        reader=threading.Thread(target=self.Read,args=(index,process),daemon=True)
+        reader.start()
+        self.running.append((index,process,job,reader))
+
+    def Read(self,index,process):
+        # Reader thread: forwards the worker output, no bpy here
+        for line in process.stdout:
+            self.lines.put((index,line.rstrip()))
+
+    def Tick(self):
+        while(len(self.pending)>0 and len(self.running)<self.workers): self.Start(*self.pending.pop(0))
+        while(not self.lines.empty()):
+            index,line=self.lines.get()
+            match=bakeSampleLine.search(line)
+            if(match): self.fractions[index]=int(match.group(1))/max(int(match.group(2)),1)
+        for entry in [entry for entry in self.running if entry[1].poll() is not None]:
+            index,process,job,reader=entry
+            self.running.remove(entry)
+            reader.join()
+            # A script error exits with 1; a job with missing images also failed
+            if(process.returncode!=0 or len(self.Collect(job))>0): self.failed.append(index)
+            self.fractions.pop(index,None)
+            self.finished+=1
+        done=(self.finished+sum(self.fractions.values()))/max(self.total,1)
+        bpy.context.window_manager.progress_update(int(100*done))
+        SetStatus("AO bake: %d/%d jobs, %d%%%s"%(self.finished,self.total,100*done,", %d failed"%len(self.failed) if self.failed else ""))
+        return len(self.pending)>0 or len(self.running)>0
+
+    def Collect(self,job):
+        # Copies the baked pixels into the original images; returns the names
+        # of the images the worker did not write
+        missing=[]
+        for name,path in job["images"].items():
+            target=bpy.data.images.get(name)
+            if(target is None): continue
+            if(not os.path.exists(path)):
+                missing.append(name)
+                continue
+            baked=bpy.data.images.load(path,check_existing=False)
+            if(tuple(baked.size)==tuple(target.size) and baked.channels==target.channels):
+                pixels=np.empty(len(baked.pixels),dtype=np.float32)
+                baked.pixels.foreach_get(pixels)
+                target.pixels.foreach_set(pixels)
+                target.update()
+            else:
+                missing.append(name)
+            bpy.data.images.remove(baked)
+        return missing
+
+    def Stop(self):
+        for index,process,job,reader in self.running: process.terminate()
+        self.running=[]
+        self.pending=[]
+        shutil.rmtree(self.folder,ignore_errors=True)
+
+def SetStatus(text):
+    # Status bar text, when the timer runs with a workspace in context
+    workspace=getattr(bpy.context,"workspace",None)
+    if(workspace is not None): workspace.status_text_set(text)
+
+def TickBake():
+    global bakeScheduler
+    if(bakeScheduler is None): return None
+    if(bakeScheduler.Tick()): return 0.5
+    failed=bakeScheduler.failed
+    bakeScheduler.Stop()
+    bakeScheduler=None
+    bpy.context.window_manager.progress_end()
+    # A failure stays in the status bar until the next status change
+    SetStatus("AO bake failed for jobs "+", ".join(str(i) for i in failed) if len(failed)>0 else None)
+    return None
+
+def BakeAOParallel(operator,objects,workers):
+    global bakeScheduler
+    if(bakeScheduler is not None):
+        operator.report({'WARNING'},"An AO bake is already running")
+        return
+    if(not BakeParallelSupported(bpy.context.scene)):
+        operator.report({'INFO'},"Selected to Active / non-image bake target: baking synchronously")
+        bpy.ops.object.bake(type="AO")
+        return
+    groups=BakeGroups(objects)
+    if(len(groups)==0):
+        operator.report({'WARNING'},"No selected object has an active Image Texture node to bake into")
+        return
+    bakeScheduler=BakeScheduler(groups,max(1,min(workers,len(groups))))
+    bpy.context.window_manager.progress_begin(0,100)
+    bpy.app.timers.register(TickBake,first_interval=0.0)
+    operator.report({'INFO'},"%d AO bake jobs on %d workers"%(len(groups),bakeScheduler.workers))
+
+#*****************************************************************************************
+# Hierarchy index: lives in centroid_rl, shared with quick_menu_rl.py together
+# with its depsgraph handler, so selecting a subtree is a set walk with no
+# operator calls
+def SelectObjects(objects,deselect=()):
+    # Only what select_grouped would touch: visible and selectable in the view layer
+    viewLayer=bpy.context.view_layer
+    for o in deselect:
+        if(o not in objects): o.select_set(False)
+    for o in objects:
+        if(o.visible_get(view_layer=viewLayer) and not o.hide_select): o.select_set(True)
+
+#*****************************************************************************************
+# Local view: a 3D viewport uses its own local view, which lives in the space and
+# leaves the object hide flags alone. Anywhere else only the objects that were
+# visible get hidden, and exactly those are shown again on exit, so whatever the
+# user had hidden before stays hidden
+localViewHidden=None
+
+def InLocalView(space):
+    if(space is not None and space.type=='VIEW_3D'): return space.local_view is not None
+    return localViewHidden is not None
+
+def EnterLocalView(space,objects):
+    global localViewHidden
+    if(space is not None and space.type=='VIEW_3D'):
+        try: bpy.ops.view3d.localview(frame_selected=False)
+        except TypeError: bpy.ops.view3d.localview()
+        space.overlay.show_annotation=False
+        return
+    viewLayer=bpy.context.view_layer
+    keep=set(objects)
+    localViewHidden=[o.name_full for o in viewLayer.objects if o not in keep and not o.hide_get()]
+    for name in localViewHidden: bpy.data.objects[name].hide_set(True)
+
+def ExitLocalView(space):
+    global localViewHidden
+    if(space is not None and space.type=='VIEW_3D'):
+        bpy.ops.view3d.localview()
+        space.overlay.show_annotation=True
+        return
+    viewLayer=bpy.context.view_layer
+    for name in localViewHidden:
+        obj=bpy.data.objects.get(name)
+        if(obj is not None and obj.name in viewLayer.objects): obj.hide_set(False)
+    localViewHidden=None
+
 #*****************************************************************************************
 pivotMode=0
-event2=None
+
+# Modes that open a dialog with their settings before running; the values
+# are remembered for the next call
+dialogSettings={
+    "SizeFromCube":("texelDensity","textureSize","compareLegacy"),
+    "TexelDensityReport":("textureSize",),
+    "PackIslandSameSize":("compareLegacy",),
+    "AutoSelectedQuads":("compareLegacy",),
+    "ExportTexture":("exportName","exportFormat"),
+    "ExportDirtyTextures":("exportName","exportFormat"),
+    "BakeAO":("bakeWorkers",),
+}
 
 class SimpleOperator(bpy.types.Operator):
     bl_idname="object.simple_operator"
     bl_label="Simple Object Operator"
 
     mode: bpy.props.StringProperty()
-    is_localview: bpy.props.BoolProperty()
+    texelDensity: bpy.props.FloatProperty(name="Texel Density (px/m)",default=128.0,min=0.001)
+    textureSize: bpy.props.IntProperty(name="Texture Size (px)",default=1024,min=1)
+    compareLegacy: bpy.props.BoolProperty(name="Compare With Legacy",default=False)
+    exportName: bpy.props.StringProperty(name="Export Name",default="//render",subtype='FILE_PATH')
+    bakeWorkers: bpy.props.IntProperty(name="Bake Workers",default=max(1,(os.cpu_count() or 2)//2),min=1)
+    exportFormat: bpy.props.EnumProperty(name="Export Format",items=(('PNG',"PNG","8-bit PNG"),('PNG16',"PNG 16","16-bit PNG"),('TGA',"TGA","Uncompressed TGA")),default='PNG')
     origSel: None
 
     @classmethod
     def poll(cls, context):
         return context.active_object is not None
 
+    def invoke(self, context, event):
+        if(self.mode in dialogSettings): return context.window_manager.invoke_props_dialog(self)
+        return self.execute(context)
+
+    def draw(self, context):
+        for name in dialogSettings.get(self.mode,()): self.layout.prop(self,name)
+
     def execute(self, context):
+        if("first_use" in timings): return self.Run(context)
+        start=time.perf_counter()
+        LoadModules()
+        result=self.Run(context)
+        timings["first_use"]=(time.perf_counter()-start)*1000.0
+        ReportTimings()
+        return result
+
+    def Run(self, context):
         global pivotMode
 
         #3D_VIEWPORT
@@ -63,61 +915,32 @@ class SimpleOperator(bpy.types.Operator):
             bpy.data.scenes["Scene"].tool_settings.snap_target="ACTIVE"
             pivotMode=0
         elif(self.mode=="Pivot_Cursor_Mesh"):
-            bpy.ops.object.mode_set(mode='EDIT')
-            
-            obj = bpy.context.active_object
-            bm = bmesh.from_edit_mesh(obj.data)
-            v = [v.co for v in bm.verts if v.select]
-
-            if(len(v)>0):
-                loc = obj.matrix_world @ (sum(v, Vector()) / len(v))
-                bpy.context.scene.cursor.location = loc
-                #space.snap_cursor_to_active()
-        
-            bpy.ops.object.mode_set(mode='OBJECT')
-            cursorPosition=bpy.context.scene.cursor.location
+            # Ends in Object Mode as it always did; leaving Edit Mode first
+            # writes the meshes once, so the selection is read straight from them
+            objects=MeshObjects()
+            if(bpy.context.mode!='OBJECT'): bpy.ops.object.mode_set(mode='OBJECT')
+            loc=centroid_rl.vertex_centroid(objects)
+            if(loc is not None):
+                bpy.context.scene.cursor.location=loc
             bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="CURSOR"
             bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
-            bpy.context.scene.cursor.location=cursorPosition
             pivotMode=1
-        elif(self.mode=="Pivot_Cursor_Center"):
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="BOUNDING_BOX_CENTER"
-            bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
-            bpy.ops.view3d.snap_cursor_to_selected()
-            bpy.ops.object.mode_set(mode='OBJECT')
-            #cursorPosition=bpy.context.scene.cursor.location
+        elif(self.mode=="Pivot_Cursor_Center" or self.mode=="Pivot_Cursor_Median"):
+            # No mode switch and the edit selection is left alone
+            if(self.mode=="Pivot_Cursor_Center"):
+                loc=centroid_rl.bounds_center(MeshObjects())
+            else:
+                loc=centroid_rl.vertex_centroid(MeshObjects(),selected_only=False)
+            if(loc is not None):
+                bpy.context.scene.cursor.location=loc
             bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="CURSOR"
             bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
-            #bpy.context.scene.cursor.location=cursorPosition
-            pivotMode=2
+            pivotMode=2 if self.mode=="Pivot_Cursor_Center" else 3
 
         elif(self.mode=="LocalView"):
-            obj=bpy.context.active_object
-            objs=bpy.context.selected_objects
-            obj_mode=bpy.context.object.mode
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
-            if(self.is_localview==False):
-                if(len(objs)>0):
-                    self.is_localview=True
-                    bpy.ops.object.select_all(action='INVERT')
-                    bpy.ops.object.hide_view_set(unselected=False)
-                    bpy.context.selected_objects.append(objs)
-                    for o in objs: o.select_set(True)
-                    obj.select_set(True)
-                    bpy.ops.object.mode_set(mode=obj_mode)
-                    bpy.context.space_data.overlay.show_annotation=False
-            else:
-                self.is_localview=False
-                bpy.ops.object.hide_view_clear()
-                bpy.ops.object.select_all(action='DESELECT')
-                if(len(objs)>0): 
-                    for o in objs: o.select_set(True)
-                    obj.select_set(True)
-                bpy.ops.object.mode_set(mode=obj_mode)
-                bpy.context.space_data.overlay.show_annotation=True
+            space=bpy.context.space_data
+            if(InLocalView(space)): ExitLocalView(space)
+            elif(len(bpy.context.selected_objects)>0): EnterLocalView(space,bpy.context.selected_objects)
         elif(self.mode=="ShowHideWireFrame"):
              if(bpy.context.space_data.overlay.show_wireframes==True):
                 bpy.context.space_data.overlay.show_wireframes=False
@@ -130,35 +953,10 @@ class SimpleOperator(bpy.types.Operator):
             else:
                 bpy.context.space_data.overlay.show_extra_edge_length=True
         elif(self.mode=="SelectGroup"):
-            objSelected=bpy.context.active_object
-            objParents=bpy.context.selected_objects
-            objSelection=[]
-            
-            while(len(objParents)>0):
-                objIndex=objParents[0]
-
-                bpy.context.view_layer.objects.active=objIndex
-                bpy.ops.object.select_grouped(type='CHILDREN_RECURSIVE')
-                objIndex.select_set(True)
-                for o in bpy.context.selected_objects: objSelection.append(o)
-                objParents.remove(objIndex)
- 
-            for o in objSelection: o.select_set(True)
-            objSelected.select_set(True)
-
+            SelectObjects(centroid_rl.hierarchy_subtree(bpy.context.selected_objects))
         elif(self.mode=="SelectChildren"):
             objParents=bpy.context.selected_objects
-            objSelection=[]
-
-            while(len(objParents)>0):
-                objIndex=objParents[0]
-
-                bpy.context.view_layer.objects.active=objIndex
-                bpy.ops.object.select_grouped(type='CHILDREN_RECURSIVE')
-                for o in bpy.context.selected_objects: objSelection.append(o)
-                objParents.remove(objIndex)
- 
-            for o in objSelection: o.select_set(True)
+            SelectObjects(centroid_rl.hierarchy_subtree(objParents,include_roots=False),deselect=objParents)
         elif(self.mode=="CustomOrientation"):
             bpy.ops.transform.create_orientation(name='orientation',overwrite=True)
             bpy.context.scene.transform_orientation_slots[1].type = 'orientation'
@@ -173,161 +971,47 @@ class SimpleOperator(bpy.types.Operator):
                 if area.type == 'IMAGE_EDITOR':
                     area.spaces[0].pivot_point="CURSOR"
         elif(self.mode=="SizeFromCube"):
-            obj=bpy.context.active_object
-            cube_size=2
-            cube_uv_size=0.25
-            
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.mesh.primitive_cube_add(size=cube_size)
-            obj_cube=bpy.context.active_object
-            obj.select_set(True)
-            bpy.ops.object.mode_set(mode='EDIT')
-            
-            bpy.ops.uv.average_islands_scale()
-            
-            bm=bmesh.from_edit_mesh(obj_cube.data)
-            uv_layer=bm.loops.layers.uv.verify()
-            bm.faces.ensure_lookup_table()
-            pos_01=bm.faces[0].loops[0][uv_layer].uv
-            pos_02=bm.faces[0].loops[1][uv_layer].uv
-            distance=mag(pos_01-pos_02)
-
-            percentage=((cube_uv_size*100)/distance)/100
-            for o in bpy.context.selected_objects:
-                bm=bmesh.from_edit_mesh(o.data)
-                uv_layer=bm.loops.layers.uv.verify()
-                for f in bm.faces:
-                    for l in f.loops:
-                        l[uv_layer].uv*=percentage
-                      
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.data.objects.remove(obj_cube,do_unlink=True)
-            bpy.context.view_layer.objects.active=obj
-            bpy.ops.object.mode_set(mode='EDIT')
-            
+            # Analytic texel density: the old 2m cube ended at 0.25 UV per edge,
+            # 0.125 UV/m, which is the 128 px/m at 1024 px default
+            objects=MeshObjects()
+            target=self.texelDensity/self.textureSize
+            RunUVMode(self,objects,lambda: SizeFromCube(objects,target),LegacySizeFromCube)
+        elif(self.mode=="TexelDensityReport"):
+            ReportTexelDensity(self,UVBuffers(MeshObjects(),create=False),self.textureSize)
         elif(self.mode=="PackIslandSameSize"):
-            obj=bpy.context.active_object
-            bm=bmesh.from_edit_mesh(obj.data)
-            uv_layer=bm.loops.layers.uv.verify()
-            
-            face_index=0
-            for f in bm.faces:
-                if(f.select==True):
-                    face_index=f.index
-                    break
-                    
-            pos_01=bm.faces[face_index].loops[0][uv_layer].uv
-            pos_02=bm.faces[face_index].loops[1][uv_layer].uv
-            distance_01=mag(pos_01-pos_02)
-
-            bpy.ops.uv.pack_islands(rotate=False,margin=0.01)
-
-            pos_01=bm.faces[face_index].loops[0][uv_layer].uv
-            pos_02=bm.faces[face_index].loops[1][uv_layer].uv
-            distance_02=mag(pos_01-pos_02)
-
-            percentage=((distance_01*100)/distance_02)/100
-
-            for f in bm.faces:
-                if(f.select==True):
-                    for l in f.loops:
-                        l[uv_layer].uv*=percentage
+            objects=MeshObjects()
+            RunUVMode(self,objects,lambda: PackIslandSameSize(objects),LegacyPackIslandSameSize)
         elif(self.mode=="FollowSelectedQuads"):
             bpy.ops.uv.select_linked()
             bpy.ops.uv.follow_active_quads()
         elif(self.mode=="AutoSelectedQuads"):
-            top_01=[-1,0]
-            top_02=[-1,0]
-            down_01=[-1,1]
-            down_02=[-1,1]
-            left_01=[-1,1]
-            left_02=[-1,1]
-            right_01=[-1,0]
-            right_02=[-1,0]
-            face_index=0
-            
-            obj=bpy.context.active_object
-            bm=bmesh.from_edit_mesh(obj.data)
-            uv_layer=bm.loops.layers.uv.verify()
-            for face in bm.faces:
-                if(face.select):
-                    face_index=face.index
-                    for loop in face.loops:
-                        if(loop[uv_layer].uv[1]>top_02[1]):
-                            top_02=[loop.vert.index,loop[uv_layer].uv[1]]
-                            if(top_02[1]>top_01[1]):
-                                temp_top=top_01
-                                top_01=top_02
-                                top_02=temp_top
-                        if(loop[uv_layer].uv[1]<down_02[1]):
-                            down_02=[loop.vert.index,loop[uv_layer].uv[1]]
-                            if(down_02[1]<down_01[1]):
-                                temp_down=down_01
-                                down_01=down_02
-                                down_02=temp_down
-                        if(loop[uv_layer].uv[0]<left_02[1]):
-                            left_02=[loop.vert.index,loop[uv_layer].uv[0]]
-                            if(left_02[1]<left_01[1]):
-                                temp_left=left_01
-                                left_01=left_02
-                                left_02=temp_left
-                        if(loop[uv_layer].uv[0]>right_02[1]):
-                            right_02=[loop.vert.index,loop[uv_layer].uv[0]]
-                            if(right_02[1]>right_01[1]):
-                                temp_right=right_01
-                                right_01=right_02
-                                right_02=temp_right
-                                
-            bpy.ops.mesh.select_mode(type="VERT")
-            vertices=[v for v in bm.verts]
-            AlignY(vertices,[top_01[0],top_02[0]])
-            AlignY(vertices,[down_01[0],down_02[0]])
-            AlignX(vertices,[left_01[0],left_02[0]])
-            AlignX(vertices,[right_01[0],right_02[0]])
-
-            bpy.ops.mesh.select_mode(type="FACE")
-            for face in bm.faces:
-                if(face.index==face):
-                    face.select=True
-                    break
-            bpy.ops.uv.select_linked()
-            bpy.ops.uv.follow_active_quads()
+            RunUVMode(self,[bpy.context.active_object],AutoSelectedQuads,LegacyAutoSelectedQuads)
         if(self.mode=="CursorToSelected"):
             bpy.ops.uv.snap_cursor(target='SELECTED')
             
         elif(self.mode=="ExportTexture"):
-            for area in bpy.context.screen.areas:
-                if(area.type=='IMAGE_EDITOR'):
-                    image=area.spaces.active.image
-                    image.pixels=area.spaces.active.image.pixels[:]
-                    image.filepath_raw = bpy.path.abspath("//render.png")
-                    image.file_format = 'PNG'
-                    image.save()
+            ExportImages(self,EditorImages(),self.exportName,self.exportFormat)
+        elif(self.mode=="ExportDirtyTextures"):
+            ExportImages(self,[image for image in bpy.data.images if image.is_dirty],self.exportName,self.exportFormat)
         
         #MATERIAL_PROPERTIES
         elif(self.mode=="LinkMaterials"):    
             bpy.ops.object.make_links_data(type='MATERIAL')
 
-        elif(self.mode=="SetAutoMaterials"):            
-            for o in bpy.context.selected_objects:
-                for i in range(0,len(o.data.materials)):
-                    o.data.materials[i]=bpy.data.materials["Material_"+str(i+1).zfill(2)]
+        elif(self.mode=="SetAutoMaterials"):
+            ApplyMaterialPreset(self,bpy.context.selected_objects,"Auto")
         elif(self.mode=="SetOcclusionMaterials"):
-            for o in bpy.context.selected_objects:
-                for i in range(0,len(o.data.materials)):
-                    o.data.materials[i]=bpy.data.materials["Material_Occlusion"]
+            ApplyMaterialPreset(self,bpy.context.selected_objects,"Occlusion")
+        elif(self.mode=="RestoreMaterials"):
+            RestoreMaterials(self,bpy.context.selected_objects)
         elif(self.mode=="SetUV0"):
             for o in bpy.context.selected_objects:    
                 o.data.uv_layers.active=o.data.uv_layers[0]
         elif(self.mode=="SetUV1"):
             for o in bpy.context.selected_objects:
                 o.data.uv_layers.active=o.data.uv_layers[1]
-        elif(self.mode=="BakeAO"):   
-            frequency=2500 #Hertz
-            duration=500
-
-            bpy.ops.object.bake(type="AO")
-            #winsound.Beep(frequency,duration)
+        elif(self.mode=="BakeAO"):
+            BakeAOParallel(self,bpy.context.selected_objects,self.bakeWorkers)
         elif(self.mode=="FixMaterialOrder"):
             for obj in bpy.context.selected_objects:
                 bpy.ops.object.mode_set(mode='OBJECT')
@@ -342,15 +1026,13 @@ class SimpleOperator(bpy.types.Operator):
         self.mode=""
         UpdateRegisters();
         return {'FINISHED'}
-
-    def invoke(self, context, event):
-        global event2
-        if(event2==None): event2=event
-        return self.execute(context)
 #******************************************************************************
 def register():
+    start=time.perf_counter()
+    bpy.utils.register_class(QuickMenu)
     bpy.utils.register_class(SimpleOperator)
-    #bpy.app.timers.register(UpdateSelection)
+    UpdateRegisters()
+    timings["register"]=(time.perf_counter()-start)*1000.0
     
     # Initial congifuration
     # Q = wm.call_menu > OBJECT_MT_quickmenu
@@ -358,13 +1040,39 @@ def register():
 
 def unregister():
     bpy.utils.unregister_class(SimpleOperator)
-    bpy.app.timers.register(UpdateSelection)
-
-if __name__ == "__main__":
-    register()
+    bpy.utils.unregister_class(QuickMenu)
+    RemoveRegisters()
     
+def Handlers():
+    return ((bpy.app.handlers.depsgraph_update_post,OnDepsgraphUpdate),(bpy.app.handlers.load_post,OnLoadPost),
+            (bpy.app.handlers.undo_post,OnUndo),(bpy.app.handlers.redo_post,OnUndo))
+
 def UpdateRegisters():
-    if not bpy.app.timers.is_registered(UpdateSelection): bpy.app.timers.register(UpdateSelection)
+    for handlers,function in Handlers():
+        if function not in handlers: handlers.append(function)
+    SubscribeMsgbus()
+
+def RemoveRegisters():
+    global msgbusSubscribed
+    global exportPool
+    global bakeScheduler
+    # By name as well: after a script reload the old functions are other objects
+    names={function.__name__ for handlers,function in Handlers()}
+    for handlers,function in Handlers():
+        for old in list(handlers):
+            if(getattr(old,"__module__",None)==__name__ and old.__name__ in names):
+                handlers.remove(old)
+    bpy.msgbus.clear_by_owner(msgbusOwner)
+    msgbusSubscribed=False
+    if(centroid_rl is not None): centroid_rl.remove_handlers()
+    if bpy.app.timers.is_registered(UpdateSelection): bpy.app.timers.unregister(UpdateSelection)
+    if bpy.app.timers.is_registered(CollectExports): bpy.app.timers.unregister(CollectExports)
+    if bpy.app.timers.is_registered(TickBake): bpy.app.timers.unregister(TickBake)
+    if(bakeScheduler is not None): bakeScheduler.Stop()
+    bakeScheduler=None
+    if(exportPool is not None): exportPool.shutdown(wait=False)
+    exportPool=None
+    exportJobs.clear()
 
 #******************************************************************************
 class QuickMenu(bpy.types.Menu):
@@ -385,7 +1093,8 @@ class QuickMenu(bpy.types.Menu):
             layout.operator('object.simple_operator',text="Pivot Center",icon="PIVOT_MEDIAN").mode="Pivot_Center"
             layout.operator('object.simple_operator',text="Pivot Active",icon="PIVOT_ACTIVE").mode="Pivot_Active"
             layout.operator('object.simple_operator',text="Pivot Cursor Mesh",icon="PIVOT_CURSOR").mode="Pivot_Cursor_Mesh"
-            layout.operator('object.simple_operator',text="Pivot Cursor Center",icon="PIVOT_MEDIAN").mode="Pivot_Cursor_Center"
+            layout.operator('object.simple_operator',text="Pivot Cursor Center",icon="PIVOT_BOUNDBOX").mode="Pivot_Cursor_Center"
+            layout.operator('object.simple_operator',text="Pivot Cursor Median",icon="PIVOT_MEDIAN").mode="Pivot_Cursor_Median"
             layout.separator()
             if(context.active_object.mode=='EDIT'):
                 layout.operator('object.simple_operator',text="Use Custom Orientation",icon="ORIENTATION_VIEW").mode="CustomOrientation"
@@ -448,16 +1157,18 @@ class QuickMenu(bpy.types.Menu):
             operation=layout.operator("uv.pack_islands",text="Pack Islands",icon="IMAGE_PLANE")
             operation.rotate=False
             operation.margin=0.01
-            layout.operator('object.simple_operator',text="Size From Cube (2m)",icon="MOD_UVPROJECT").mode="SizeFromCube"
-            layout.operator('object.simple_operator',text="Pack Islands Same Size",icon="IMAGE_REFERENCE").mode="PackIslandSameSize"
+            layout.operator('object.simple_operator',text="Set Texel Density...",icon="MOD_UVPROJECT").mode="SizeFromCube"
+            layout.operator('object.simple_operator',text="Report Texel Density...",icon="INFO").mode="TexelDensityReport"
+            layout.operator('object.simple_operator',text="Pack Islands Same Size...",icon="IMAGE_REFERENCE").mode="PackIslandSameSize"
             layout.separator()
             layout.operator('uv.align',text="Align Auto Vertex",icon="SURFACE_NCURVE")
             layout.operator('object.simple_operator',text="Follow Selected Quads",icon="MOD_LATTICE").mode="FollowSelectedQuads"
-            layout.operator('object.simple_operator',text="Auto Follow Selected Quads",icon="OUTLINER_OB_LATTICE").mode="AutoSelectedQuads"
+            layout.operator('object.simple_operator',text="Auto Follow Selected Quads...",icon="OUTLINER_OB_LATTICE").mode="AutoSelectedQuads"
             layout.separator()
             layout.operator('object.simple_operator',text="Cursor To Selected",icon="PIVOT_CURSOR").mode="CursorToSelected"
             layout.separator()
-            layout.operator('object.simple_operator',text="Export Texture",icon="RESTRICT_RENDER_OFF").mode="ExportTexture"
+            layout.operator('object.simple_operator',text="Export Texture...",icon="RESTRICT_RENDER_OFF").mode="ExportTexture"
+            layout.operator('object.simple_operator',text="Export Dirty Textures...",icon="RESTRICT_RENDER_OFF").mode="ExportDirtyTextures"
         
         #PROPERTIES
         elif(bpy.context.space_data.type=='PROPERTIES'):
@@ -466,49 +1177,115 @@ class QuickMenu(bpy.types.Menu):
             layout.separator()
             layout.operator('object.simple_operator',text="Set Auto Materials",icon="BRUSH_MIX").mode="SetAutoMaterials"
             layout.operator('object.simple_operator',text="Set Occlusion Materials",icon="BRUSH_SCULPT_DRAW").mode="SetOcclusionMaterials"
+            layout.operator('object.simple_operator',text="Restore Materials",icon="LOOP_BACK").mode="RestoreMaterials"
             layout.separator()
             layout.operator('object.simple_operator',text="Set UV0",icon="MATCLOTH").mode="SetUV0"
             layout.operator('object.simple_operator',text="Set UV1",icon="MATCLOTH").mode="SetUV1"
             layout.separator()
-            layout.operator('object.simple_operator',text="Bake Occlusion Map",icon="TEMP").mode="BakeAO"
+            layout.operator('object.simple_operator',text="Bake Occlusion Map...",icon="TEMP").mode="BakeAO"
 #******************************************************************************
+# Selection tracking is event driven: the depsgraph handler and the msgbus
+# callbacks only flag what changed and schedule UpdateSelection once, so an
+# idle session does no work at all
 previousSelectedObjects=None
 previousSelectedObjectsLocation=[0,0,0]
+selectionChanged=False
+objectMoved=False
+moveCounter=0
+lastMoveCounter=0
+msgbusOwner=object()
+msgbusSubscribed=False
+
+def ScheduleUpdate():
+    if not bpy.app.timers.is_registered(UpdateSelection): bpy.app.timers.register(UpdateSelection,first_interval=0.0)
+
+def OnSelectionChanged():
+    global selectionChanged
+    selectionChanged=True
+    ScheduleUpdate()
+
+def OnObjectMoved():
+    global objectMoved
+    global moveCounter
+    objectMoved=True
+    moveCounter+=1
+    ScheduleUpdate()
+
+@persistent
+def OnDepsgraphUpdate(scene, depsgraph):
+    # Selection is tagged on the scene; moves come as object transform updates
+    for update in depsgraph.updates:
+        if(isinstance(update.id,bpy.types.Scene)): OnSelectionChanged()
+        elif(update.is_updated_transform and isinstance(update.id,bpy.types.Object)): OnObjectMoved()
+    if(depsgraph.id_type_updated('MATERIAL')): InvalidateMaterialIndex()
+
+@persistent
+def OnLoadPost(dummy):
+    # Loading a file clears every msgbus subscription
+    global msgbusSubscribed
+    global localViewHidden
+    msgbusSubscribed=False
+    SubscribeMsgbus()
+    InvalidateMaterialIndex()
+    materialSnapshot.clear()
+    localViewHidden=None
+
+@persistent
+def OnUndo(scene):
+    # Undo can reload every ID: cached material references are no longer valid
+    InvalidateMaterialIndex()
+
+def SubscribeMsgbus():
+    global msgbusSubscribed
+    if(msgbusSubscribed): return
+    bpy.msgbus.subscribe_rna(key=(bpy.types.LayerObjects,"active"),owner=msgbusOwner,args=(),notify=OnSelectionChanged)
+    bpy.msgbus.subscribe_rna(key=(bpy.types.Object,"location"),owner=msgbusOwner,args=(),notify=OnObjectMoved)
+    msgbusSubscribed=True
+
+def TransformRunning():
+    # Window.modal_operators only exists in recent versions; older ones rely on
+    # the updates having stopped for a whole interval
+    window=bpy.context.window
+    operators=getattr(window,"modal_operators",None) if window else None
+    return operators is not None and any(op.bl_idname.startswith("TRANSFORM_OT") for op in operators)
 
 def UpdateSelection():
     global previousSelectedObjects
     global previousSelectedObjectsLocation
     global pivotMode
-    global event2
+    global selectionChanged
+    global objectMoved
+    global lastMoveCounter
 
-    selectedObjects=bpy.context.selected_objects
+    if(selectionChanged):
+        selectionChanged=False
+        selectedObjects=bpy.context.selected_objects
+        selectedNames=[o.name for o in selectedObjects]
 
-    if(event2==None): bpy.ops.object.simple_operator('INVOKE_DEFAULT')
-    
-    if(selectedObjects!=previousSelectedObjects):
-        existsObjectActive=False
+        if(selectedNames!=previousSelectedObjects):
+            active=bpy.context.view_layer.objects.active
+            if(active is None or not active.select_get()):
+                if(len(selectedObjects)>0): bpy.context.view_layer.objects.active=selectedObjects[0]
+            previousSelectedObjects=selectedNames
 
-        for obj in selectedObjects: 
-            if(obj==bpy.context.active_object): existsObjectActive=True
-            
-        if(existsObjectActive==False):
-            if(len(selectedObjects)>0): bpy.context.view_layer.objects.active=selectedObjects[0]
-        previousSelectedObjects=selectedObjects 
-
-        pivotMode=0
-
-    if(len(selectedObjects)>0):
-        if(event2.type == 'LEFTMOUSE'):
-            if(event2.value == 'RELEASE'):
-                selectedOBJPosition=selectedObjects[0].location
-                if(CompareVector(previousSelectedObjectsLocation,selectedOBJPosition)==False):
-                    previousSelectedObjectsLocation=[selectedOBJPosition[0],selectedOBJPosition[1],selectedOBJPosition[2]]
-                    if(pivotMode==1): 
-                        bpy.ops.object.simple_operator(mode="Pivot_Cursor_Mesh")
-                    elif(pivotMode==22):
-                        bpy.ops.object.simple_operator(mode="Pivot_Cursor_Center")
-                    print(str(pivotMode)+"   "+str(selectedObjects[0].location))
-    return 0.250
+            pivotMode=0
+
+    if(objectMoved):
+        # Wait for the transform to end: check again while moves keep coming
+        if(moveCounter!=lastMoveCounter or TransformRunning()):
+            lastMoveCounter=moveCounter
+            return 0.250
+        objectMoved=False
+
+        selectedObjects=bpy.context.selected_objects
+        if(len(selectedObjects)>0):
+            selectedOBJPosition=selectedObjects[0].location
+            if(CompareVector(previousSelectedObjectsLocation,selectedOBJPosition)==False):
+                previousSelectedObjectsLocation=[selectedOBJPosition[0],selectedOBJPosition[1],selectedOBJPosition[2]]
+                # Only the selection pivot follows moves; Center and Median stay put
+                if(pivotMode==1):
+                    bpy.ops.object.simple_operator(mode="Pivot_Cursor_Mesh")
+    return None
 
 def CompareVector(vectorA,vectorB):
     if(vectorA[0]!=vectorB[0]): return False
@@ -516,8 +1293,8 @@ def CompareVector(vectorA,vectorB):
     if(vectorA[2]!=vectorB[2]): return False
     return True
 #******************************************************************************
-bpy.utils.register_class(QuickMenu)
-bpy.app.timers.register(UpdateSelection)
+if __name__ == "__main__":
+    register()
 
 # handle the keymap
 #wm = bpy.context.window_manager
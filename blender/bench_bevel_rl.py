@@ -0,0 +1,270 @@
+# Benchmark headless do Bevel RL
+#
+#   blender --background --factory-startup --python-exit-code 1 \
+#       --python bench_bevel_rl.py -- --out resultado.json
+#
+#   blender --background --factory-startup --python-exit-code 1 \
+#       --python bench_bevel_rl.py -- --out novo.json --baseline resultado.json
+#
+# Gera malhas procedurais (grid, cubo subdividido, cilindro) com ~1k a ~1M
+# edges, seleciona conjuntos de edges de tamanho controlado e mede o execute
+# de BevelRL_OT_edge_bevel para cada combinação de parâmetros. A saída é JSON
+# ou CSV (pela extensão) com o tempo por fase; com --baseline, compara as
+# medianas com um resultado guardado e sai com código 1 se alguma regrediu.
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+import bpy
+import bmesh
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bevel_rl
+
+# Fases do relatório -> tempos registrados pelo operador em bevel_rl.last_timings
+PHASES = {
+    "capture": ("capture",),
+    "bevel": ("bevel",),
+    "normals": ("normals",),
+    "depth": ("index", "query", "rails", "read", "math", "write", "depth"),
+    "sync": ("sync",),
+    "cache": ("cache", "snapshot"),
+}
+
+KEY_FIELDS = ("shape", "edges", "selected", "segments", "offset", "depth", "profile", "engine", "depth_mode")
+
+
+def float_list(text):
+    return [float(x) for x in text.split(",")]
+
+
+def int_list(text):
+    return [int(x) for x in text.split(",")]
+
+
+def str_list(text):
+    return text.split(",")
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="bench_bevel_rl.py")
+    parser.add_argument("--out", default="bench_bevel_rl.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="regressão se a mediana passar do baseline por essa fração")
+    parser.add_argument("--shapes", type=str_list, default=["grid", "cube", "cylinder"])
+    parser.add_argument("--sizes", type=int_list, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--selected", type=int_list, default=[10, 100, 1000])
+    parser.add_argument("--segments", type=int_list, default=[2, 4])
+    parser.add_argument("--offset", type=float_list, default=[0.02])
+    parser.add_argument("--depth", type=float_list, default=[0.0, 0.02])
+    parser.add_argument("--profile", type=float_list, default=[1.0])
+    parser.add_argument("--engine", type=str_list, default=["OPERATOR", "BMESH"])
+    parser.add_argument("--depth-mode", type=str_list, default=["VECTOR", "LOOP"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+# MALHAS
+def build_grid(bm, edges):
+    n = max(1, round(math.sqrt(edges / 2.0)))
+    bmesh.ops.create_grid(bm, x_segments=n, y_segments=n, size=1.0)
+
+
+def build_cube(bm, edges):
+    cuts = max(0, round(math.sqrt(edges / 12.0)) - 1)
+    bmesh.ops.create_cube(bm, size=2.0)
+    if cuts:
+        bmesh.ops.subdivide_edges(bm, edges=bm.edges[:], cuts=cuts, use_grid_fill=True)
+
+
+def build_cylinder(bm, edges):
+    n = max(3, round(math.sqrt(edges / 2.0)))
+    bmesh.ops.create_cone(bm, cap_ends=True, segments=n, radius1=1.0, radius2=1.0, depth=2.0)
+    # Anéis ao longo da altura: corta só as edges verticais
+    vertical = [e for e in bm.edges if abs(e.verts[0].co.z - e.verts[1].co.z) > 1e-6]
+    bmesh.ops.subdivide_edges(bm, edges=vertical, cuts=n - 1, use_grid_fill=True)
+
+
+BUILDERS = {"grid": build_grid, "cube": build_cube, "cylinder": build_cylinder}
+
+
+def make_object(shape, edges):
+    bm = bmesh.new()
+    BUILDERS[shape](bm, edges)
+    mesh = bpy.data.meshes.new("bench_%s" % shape)
+    bm.to_mesh(mesh)
+    bm.free()
+
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def clear_scene():
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        if mesh.users == 0 and not mesh.name.startswith(".BevelRL"):
+            bpy.data.meshes.remove(mesh)
+
+
+def select_edges(obj, count, seed):
+    # Seleciona count edges em Object Mode, em lote, antes de entrar no Edit Mode
+    mesh = obj.data
+    total = len(mesh.edges)
+    chosen = set(random.Random(seed).sample(range(total), min(count, total)))
+    mesh.vertices.foreach_set("select", [False] * len(mesh.vertices))
+    mesh.polygons.foreach_set("select", [False] * len(mesh.polygons))
+    mesh.edges.foreach_set("select", [i in chosen for i in range(total)])
+    for i in chosen:
+        for v in mesh.edges[i].vertices:
+            mesh.vertices[v].select = True
+    return len(chosen)
+
+
+# EXECUÇÃO
+def run_case(shape, edges, selected, params, seed):
+    clear_scene()
+    bevel_rl._clear_cache()
+
+    obj = make_object(shape, edges)
+    real_edges = len(obj.data.edges)
+    real_selected = select_edges(obj, selected, seed)
+
+    bpy.context.view_layer.objects.active = obj
+    obj.select_set(True)
+    bpy.context.scene.tool_settings.mesh_select_mode = (False, True, False)
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    t_start = time.perf_counter()
+    bpy.ops.object.edge_bevel_custom(**params)
+    total = time.perf_counter() - t_start
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    timings = bevel_rl.last_timings.get(obj.name, {})
+    phases = {phase: sum(timings.get(name, 0.0) for name in names) * 1000.0 for phase, names in PHASES.items()}
+    record = dict(shape=shape, edges=real_edges, selected=real_selected, **params)
+    record["total_ms"] = total * 1000.0
+    record.update(("%s_ms" % phase, ms) for phase, ms in phases.items())
+    record["other_ms"] = record["total_ms"] - sum(phases.values())
+    return record
+
+
+def cases(args):
+    for shape in args.shapes:
+        for edges in args.sizes:
+            for selected in args.selected:
+                if selected > edges // 4:
+                    continue
+                for segments in args.segments:
+                    for offset in args.offset:
+                        for depth in args.depth:
+                            for profile in args.profile:
+                                for engine in args.engine:
+                                    for depth_mode in args.depth_mode:
+                                        yield shape, edges, selected, dict(
+                                            segments=segments, offset=offset, depth=depth,
+                                            profile=profile, engine=engine, depth_mode=depth_mode,
+                                        )
+
+
+# RESULTADOS
+def write_results(records, path):
+    if path.endswith(".csv"):
+        fields = sorted({name for record in records for name in record})
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            json.dump(records, f, indent=1)
+
+
+def read_results(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            records = list(csv.DictReader(f))
+        for record in records:
+            for name, value in record.items():
+                try:
+                    record[name] = float(value)
+                except ValueError:
+                    pass
+        return records
+    with open(path) as f:
+        return json.load(f)
+
+
+def key_value(value):
+    # JSON guarda inteiros e CSV devolve floats: normaliza números para comparar
+    return "%g" % value if isinstance(value, (int, float)) else str(value)
+
+
+def medians(records, key_fields):
+    groups = {}
+    for record in records:
+        key = tuple(key_value(record[name]) for name in key_fields)
+        groups.setdefault(key, []).append(float(record["total_ms"]))
+    return {key: statistics.median(values) for key, values in groups.items()}
+
+
+def compare(records, baseline, threshold, key_fields=KEY_FIELDS):
+    # Devolve (chave, baseline_ms, atual_ms) de cada caso mais lento que o baseline
+    current = medians(records, key_fields)
+    previous = medians(baseline, key_fields)
+    regressions = []
+    for key, ms in sorted(current.items()):
+        base = previous.get(key)
+        if base is not None and ms > base * (1.0 + threshold):
+            regressions.append((key, base, ms))
+    return regressions
+
+
+def report_regressions(regressions, key_fields=KEY_FIELDS):
+    for key, base, ms in regressions:
+        case = ", ".join("%s=%s" % item for item in zip(key_fields, key))
+        print("REGRESSÃO %s: %.1f ms -> %.1f ms (%+.0f%%)" % (case, base, ms, (ms / base - 1.0) * 100.0))
+
+
+def main():
+    args = parse_args()
+    bevel_rl.register()
+
+    records = []
+    try:
+        for shape, edges, selected, params in cases(args):
+            for repeat in range(args.repeat):
+                record = run_case(shape, edges, selected, params, args.seed + repeat)
+                record["repeat"] = repeat
+                records.append(record)
+                print("%(shape)s %(edges)d edges, %(selected)d sel, %(engine)s/%(depth_mode)s: %(total_ms).1f ms" % record)
+    finally:
+        clear_scene()
+        bevel_rl.unregister()
+
+    write_results(records, args.out)
+    print("%d medições em %s" % (len(records), args.out))
+
+    if args.baseline:
+        regressions = compare(records, read_results(args.baseline), args.threshold)
+        report_regressions(regressions)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# Benchmark headless do QuickMenu
+#
+#   blender --background --factory-startup --python-exit-code 1 \
+#       --python bench_quick_menu_rl.py -- --out quick.json --legacy-rev baseline
+#
+#   blender --background --factory-startup --python-exit-code 1 \
+#       --python bench_quick_menu_rl.py -- --out novo.json --baseline quick.json
+#
+# Monta cenas sintéticas (de 10 a 50k objetos em hierarquias profundas e malhas
+# com até ~1M loops de UV) e mede os operadores do quick_menu_rl e os modos do
+# SimpleOperator do QuickMenuRL. Com --legacy-rev (uma revisão do git) ou
+# --legacy-dir (uma pasta com as cópias antigas dos dois arquivos), a versão
+# antiga dos add-ons roda nos mesmos casos, antes da atual, e o resumo mostra
+# as duas lado a lado. Saída, baseline e regressões usam o bench_bevel_rl; só
+# medições sem erro entram nas medianas, e um caso que passava no baseline e
+# agora dá erro conta como regressão.
+#
+# O Local View não é medido: em --background não há janela nem área VIEW_3D,
+# então nem o caminho do view3d.localview nem a versão antiga (que usa
+# space_data.overlay) rodariam; sobraria só o fallback sem viewport.
+
+import argparse
+import importlib.util
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import bpy
+import bmesh
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_bevel_rl import (
+    clear_scene, compare, int_list, key_value, read_results, report_regressions, write_results,
+)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ADDONS = ("QuickMenuRL", "quick_menu_rl")
+KEY_FIELDS = ("impl", "case", "objects", "depth", "loops")
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="bench_quick_menu_rl.py")
+    parser.add_argument("--out", default="bench_quick_menu_rl.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="regressão se a mediana passar do baseline por essa fração")
+    parser.add_argument("--legacy-rev", help="revisão do git com a versão antiga dos add-ons")
+    parser.add_argument("--legacy-dir", help="pasta com QuickMenuRL.py e quick_menu_rl.py antigos")
+    parser.add_argument("--objects", type=int_list, default=[10, 1000, 10000, 50000])
+    parser.add_argument("--depth", type=int_list, default=[3, 12])
+    parser.add_argument("--loops", type=int_list, default=[10000, 100000, 1000000])
+    parser.add_argument("--selected", type=int, default=100,
+                        help="objetos selecionados nos casos de pivô")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+# IMPLEMENTAÇÕES
+def legacy_folder(args):
+    # Extrai os dois arquivos da revisão pedida para uma pasta temporária
+    if args.legacy_dir:
+        return args.legacy_dir
+    if not args.legacy_rev:
+        return None
+    root = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=HERE,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    prefix = os.path.relpath(HERE, root).replace(os.sep, "/")
+    folder = tempfile.mkdtemp(prefix="bench_quick_menu_")
+    for name in ADDONS:
+        source = subprocess.run(["git", "show", "%s:%s/%s.py" % (args.legacy_rev, prefix, name)], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        with open(os.path.join(folder, name + ".py"), "w") as f:
+            f.write(source)
+    return folder
+
+
+def load_addons(folder, impl, modules):
+    # Cada implementação é importada com outro nome de módulo; a antiga
+    # registra parte das classes já no import
+    for name in ADDONS:
+        spec = importlib.util.spec_from_file_location("%s_%s" % (name, impl), os.path.join(folder, name + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        modules.append(module)
+        module.register()
+
+
+def unload_addons(modules):
+    # Além do unregister, tira o que a versão antiga deixava registrado:
+    # classes registradas no import, timers e handlers
+    for module in reversed(modules):
+        try:
+            module.unregister()
+        except (RuntimeError, ValueError) as error:
+            print("unregister de %s: %s" % (module.__name__, error))
+        for value in list(vars(module).values()):
+            if isinstance(value, type) and value.__module__ == module.__name__ and "bl_rna" in value.__dict__:
+                try:
+                    bpy.utils.unregister_class(value)
+                except RuntimeError:
+                    pass
+            elif callable(value) and bpy.app.timers.is_registered(value):
+                bpy.app.timers.unregister(value)
+        for handlers in vars(bpy.app.handlers).values():
+            if isinstance(handlers, list):
+                for function in list(handlers):
+                    if getattr(function, "__module__", None) == module.__name__:
+                        handlers.remove(function)
+        sys.modules.pop(module.__name__, None)
+
+
+# CENAS
+def build_hierarchy(count, depth):
+    # Floresta de árvores binárias com `depth` níveis, todas sobre a mesma
+    # malha; os filhos seguem a convenção "_" de nome do Select Object Group
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=1.0)
+    mesh = bpy.data.meshes.new("bench_cube")
+    bm.to_mesh(mesh)
+    bm.free()
+
+    collection = bpy.data.collections.new("bench_hierarchy")
+    bpy.context.scene.collection.children.link(collection)
+    per_tree = min(count, 2 ** depth - 1)
+    objects = []
+    for i in range(count):
+        tree, node = divmod(i, per_tree)
+        obj = bpy.data.objects.new("group%d" % tree if node == 0 else "group%d_%d" % (tree, node), mesh)
+        obj.location = (tree * 3.0, node * 0.01, 0.0)
+        if node:
+            obj.parent = objects[tree * per_tree + (node - 1) // 2]
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects, per_tree
+
+
+def build_uv_mesh(loops, seed):
+    # Grade com ~loops/4 quads, UVs do create_grid e três materiais
+    # espalhados nas faces para o Fix Material Order
+    n = max(1, round(math.sqrt(loops / 4.0)))
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=n, y_segments=n, size=1.0, calc_uvs=True)
+    mesh = bpy.data.meshes.new("bench_uv")
+    bm.to_mesh(mesh)
+    bm.free()
+    if not mesh.uv_layers:
+        mesh.uv_layers.new()
+    for i in range(3):
+        mesh.materials.append(bpy.data.materials.get("bench_%d" % i) or bpy.data.materials.new("bench_%d" % i))
+    shuffle_materials(mesh, seed)
+
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def shuffle_materials(mesh, seed):
+    rng = random.Random(seed)
+    mesh.polygons.foreach_set("material_index", [rng.randrange(3) for _ in range(len(mesh.polygons))])
+    mesh.update()
+
+
+def clear():
+    clear_scene()
+    for collection in list(bpy.data.collections):
+        if collection.name.startswith("bench_"):
+            bpy.data.collections.remove(collection)
+
+
+def select_only(objects, active):
+    bpy.ops.object.select_all(action='DESELECT')
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = active
+
+
+# EXECUÇÃO
+def timed(call):
+    t_start = time.perf_counter()
+    try:
+        call()
+        status = "ok"
+    except Exception as error:
+        status = "erro: %s" % (str(error).strip().splitlines() or [type(error).__name__])[-1]
+    return (time.perf_counter() - t_start) * 1000.0, status
+
+
+def simple(mode):
+    return lambda: bpy.ops.object.simple_operator(mode=mode)
+
+
+def object_cases(objects, per_tree, selected):
+    # (caso, preparo fora da medição, chamada medida); a folha é o último nó
+    # da primeira árvore, no nível mais fundo
+    roots = objects[::per_tree]
+    leaf = objects[per_tree - 1]
+    some = objects[:selected]
+    return (
+        ("select_object_group", lambda: select_only([leaf], leaf), bpy.ops.object.select_object_group),
+        ("set_pivot_to_object_center", lambda: select_only(some, some[0]), bpy.ops.object.set_pivot_to_object_center),
+        ("set_pivot_to_object_point", lambda: select_only(some, some[0]), bpy.ops.object.set_pivot_to_object_point),
+        ("SelectGroup", lambda: select_only(roots, roots[0]), simple("SelectGroup")),
+        ("SelectChildren", lambda: select_only(roots, roots[0]), simple("SelectChildren")),
+    )
+
+
+def mesh_cases(obj, seed):
+    def edit():
+        if obj.mode != 'EDIT':
+            select_only([obj], obj)
+            bpy.ops.object.mode_set(mode='EDIT')
+        bpy.ops.mesh.select_all(action='SELECT')
+
+    def leave_edit():
+        if obj.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        # Faces fora de ordem a cada rodada: a versão atual pula malhas já ordenadas
+        shuffle_materials(obj.data, seed)
+        select_only([obj], obj)
+
+    return (
+        ("SizeFromCube", edit, simple("SizeFromCube")),
+        ("PackIslandSameSize", edit, simple("PackIslandSameSize")),
+        ("fix_materials_order", leave_edit, bpy.ops.object.fix_materials_order),
+    )
+
+
+def run_cases(impl, cases, repeat, **scene):
+    # Cada rodada passa por todos os casos em ordem
+    records = []
+    for i in range(repeat):
+        for case, prepare, call in cases:
+            prepare()
+            ms, status = timed(call)
+            records.append(dict(impl=impl, case=case, repeat=i, total_ms=ms, status=status, **scene))
+    if bpy.context.object is not None and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for case, prepare, call in cases:
+        runs = [record for record in records if record["case"] == case]
+        print("%s %s %s: %.1f ms (%s)" % (impl, case, scene, statistics.median(r["total_ms"] for r in runs), runs[-1]["status"]))
+    return records
+
+
+def run_implementation(impl, folder, args):
+    clear()
+    modules = []
+    ms, status = timed(lambda: load_addons(folder, impl, modules))
+    records = [dict(impl=impl, case="register", objects=0, depth=0, loops=0, repeat=0, total_ms=ms, status=status)]
+    try:
+        for count in args.objects:
+            for depth in args.depth:
+                clear()
+                objects, per_tree = build_hierarchy(count, depth)
+                records += run_cases(impl, object_cases(objects, per_tree, min(args.selected, count)), args.repeat,
+                                     objects=count, depth=depth, loops=0)
+        for loops in args.loops:
+            clear()
+            obj = build_uv_mesh(loops, args.seed)
+            records += run_cases(impl, mesh_cases(obj, args.seed), args.repeat,
+                                 objects=1, depth=0, loops=len(obj.data.loops))
+    finally:
+        clear()
+        unload_addons(modules)
+    return records
+
+
+# RESULTADOS
+def passed(records):
+    return [record for record in records if record.get("status") == "ok"]
+
+
+def broken(records, baseline):
+    # Casos com medição ok no baseline e nenhuma agora
+    def keys(rows):
+        return {tuple(key_value(row[name]) for name in KEY_FIELDS) for row in passed(rows)}
+    failing = {tuple(key_value(record[name]) for name in KEY_FIELDS) for record in records} - keys(records)
+    return sorted(failing & keys(baseline))
+
+
+def side_by_side(records):
+    # Mediana por caso e implementação, com a razão antiga/atual
+    groups = {}
+    for record in records:
+        if record["status"] != "ok":
+            continue
+        key = tuple(key_value(record[name]) for name in KEY_FIELDS[1:])
+        groups.setdefault(key, {}).setdefault(record["impl"], []).append(record["total_ms"])
+    for key, impls in sorted(groups.items()):
+        case = ", ".join("%s=%s" % item for item in zip(KEY_FIELDS[1:], key))
+        new = statistics.median(impls["new"]) if "new" in impls else None
+        old = statistics.median(impls["legacy"]) if "legacy" in impls else None
+        if new is not None and old is not None:
+            print("%s: antigo %.1f ms, atual %.1f ms (%.1fx)" % (case, old, new, old / max(new, 1e-6)))
+        else:
+            print("%s: %.1f ms" % (case, new if new is not None else old))
+
+
+def main():
+    args = parse_args()
+    implementations = [("new", HERE)]
+    folder = legacy_folder(args)
+    if folder:
+        implementations.insert(0, ("legacy", folder))
+
+    records = []
+    for impl, path in implementations:
+        records += run_implementation(impl, path, args)
+
+    write_results(records, args.out)
+    print("%d medições em %s" % (len(records), args.out))
+    side_by_side(records)
+
+    if args.baseline:
+        baseline = read_results(args.baseline)
+        regressions = compare(passed(records), passed(baseline), args.threshold, KEY_FIELDS)
+        report_regressions(regressions, KEY_FIELDS)
+        failures = broken(records, baseline)
+        for key in failures:
+            print("REGRESSÃO %s: passava no baseline, agora dá erro" % ", ".join("%s=%s" % item for item in zip(KEY_FIELDS, key)))
+        if regressions or failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bpy
 import bmesh
-from mathutils import Vector
+import numpy as np
+from mathutils import Vector, kdtree
 
 bl_info = {
     "name": "Bevel RL",
@@ -12,10 +18,337 @@ bl_info = {
     "category": "Mesh",
 }
 
-class BevelRL_OT_edge_bevel(bpy.types.Operator):
-    bl_idname = "object.edge_bevel_custom"
-    bl_label = "Aplicar Bevel"
-    bl_options = {'REGISTER', 'UNDO'}
+_SOURCE_LAYER = "bevel_rl_source"
+_PROFILE_TREE = ".BevelRL_Profile"
+
+# Tabela do perfil: influência amostrada em t = 0..1, refeita só quando o perfil muda
+_TABLE_X = np.linspace(0.0, 1.0, 256, dtype=np.float32)
+_table = {"key": None, "values": None}
+
+# Malhas já chanfradas por objeto, para o painel de redo (nome da malha -> _BevelCache)
+_cache = {}
+
+# Tempos por fase (segundos) da última execução, por objeto; lido pelo benchmark
+last_timings = {}
+
+
+def _edge_midpoint(e):
+    return (e.verts[0].co + e.verts[1].co) / 2
+
+
+def _midpoint_tree(bm):
+    edges = list(bm.edges)
+    tree = kdtree.KDTree(len(edges))
+    for i, e in enumerate(edges):
+        tree.insert(_edge_midpoint(e), i)
+    tree.balance()
+    return edges, tree
+
+
+def _find_near(edges, tree, mid, radius, slack=0.0):
+    # Edges cujo ponto médio atual está a menos de radius de mid, na ordem de
+    # bm.edges. slack cobre pontos médios que se moveram depois da construção
+    # da árvore; a folga relativa cobre o arredondamento de float da árvore
+    found = []
+    for _, i, _ in tree.find_range(mid, radius * (1.0 + 1e-4) + slack):
+        e = edges[i]
+        dist = (_edge_midpoint(e) - mid).length
+        if dist < radius:
+            found.append((i, e, dist))
+    found.sort(key=lambda item: item[0])
+    return [(e, dist) for _, e, dist in found]
+
+
+def _proximity_matches(edges, tree, midpoints, radius):
+    matches = []
+    for mid in midpoints:
+        near = _find_near(edges, tree, mid, radius)
+        if not near:
+            continue
+        max_dist = max(d for _, d in near) or 1e-6
+        matches.extend((e, 1.0 - (dist / max_dist)) for e, dist in near)
+    return matches
+
+
+def _influence(t, profile, table=None):
+    if table is not None:
+        return float(np.interp(t, _TABLE_X, table))
+    # Curva superelipse
+    return (1.0 - abs(1.0 - t) ** profile) ** (1.0 / profile)
+
+
+def _profile_node(create=False):
+    # A curva customizada fica num node group oculto: CurveMapping só existe
+    # dentro de nodes, não como propriedade de um PropertyGroup
+    tree = bpy.data.node_groups.get(_PROFILE_TREE)
+    if tree is None:
+        if not create:
+            return None
+        tree = bpy.data.node_groups.new(_PROFILE_TREE, 'ShaderNodeTree')
+        tree.use_fake_user = True
+    node = tree.nodes.get("Profile")
+    if node is None and create:
+        node = tree.nodes.new('ShaderNodeRGBCurve')
+        node.name = "Profile"
+    return node
+
+
+def _profile_table(profile_type, profile):
+    if profile_type == 'CURVE':
+        mapping = _profile_node(create=True).mapping
+        curve = mapping.curves[3]
+        key = ('CURVE', mapping.use_clip, tuple(
+            (p.location[0], p.location[1], p.handle_type) for p in curve.points
+        ))
+    else:
+        key = ('SUPERELLIPSE', profile)
+
+    if _table["key"] != key:
+        if profile_type == 'CURVE':
+            mapping.initialize()
+            values = [mapping.evaluate(curve, x) for x in _TABLE_X.tolist()]
+            _table["values"] = np.array(values, dtype=np.float32)
+        else:
+            _table["values"] = np.power(1.0 - np.power(1.0 - _TABLE_X, profile), 1.0 / profile)
+        _table["key"] = key
+    return _table["values"]
+
+
+def _displace(coords, normals, edge_verts, t, depth, table):
+    # Deslocamento em lote: coords/normals (n, 3) e edge_verts (m, 2) indexam
+    # os vértices envolvidos, t (m,) é a posição de cada edge no perfil e
+    # table é a influência amostrada em _TABLE_X
+    influence = np.interp(t, _TABLE_X, table).astype(np.float32)
+    influence[influence < 0.0] = 0.0
+
+    edge_normals = normals[edge_verts[:, 0]] + normals[edge_verts[:, 1]]
+    length = np.linalg.norm(edge_normals, axis=1)
+    length[length == 0.0] = 1.0
+    push = edge_normals * (depth * influence / length)[:, None]
+
+    # Um único deslocamento por vértice: média das edges que o empurram
+    index = edge_verts.ravel()
+    count = np.bincount(index, weights=np.repeat(influence > 0.0, 2), minlength=len(coords))
+    offset = np.zeros_like(coords)
+    for axis in range(3):
+        offset[:, axis] = np.bincount(index, weights=np.repeat(push[:, axis], 2), minlength=len(coords))
+    np.divide(offset, count[:, None], out=offset, where=count[:, None] > 0.0)
+
+    return coords + offset
+
+
+def _gather(matches):
+    verts = {}
+    edge_verts = np.empty((len(matches), 2), dtype=np.int32)
+    for k, (e, _) in enumerate(matches):
+        edge_verts[k, 0] = verts.setdefault(e.verts[0], len(verts))
+        edge_verts[k, 1] = verts.setdefault(e.verts[1], len(verts))
+
+    verts = list(verts)
+    coords = np.array([v.co[:] for v in verts], dtype=np.float32).reshape(-1, 3)
+    normals = np.array([v.normal[:] for v in verts], dtype=np.float32).reshape(-1, 3)
+    t = np.fromiter((t for _, t in matches), dtype=np.float32, count=len(matches))
+    return verts, coords, normals, edge_verts, t
+
+
+def _timed_displace(coords, normals, edge_verts, t, depth, table):
+    # Roda nas threads do pool: só NumPy, nada de bpy/bmesh
+    t_start = time.perf_counter()
+    coords = _displace(coords, normals, edge_verts, t, depth, table)
+    return coords, time.perf_counter() - t_start
+
+
+def _write_coords(verts, coords):
+    for v, co in zip(verts, coords.tolist()):
+        v.co = co
+
+
+def _apply_depth_loop(matches, depth, profile, table=None):
+    # Modo de referência: uma edge por vez, como o deslocamento original
+    for e, t in matches:
+        influence = _influence(t, profile, table)
+
+        if influence <= 0:
+            continue
+
+        normal = (e.verts[0].normal + e.verts[1].normal).normalized()
+        for v in e.verts:
+            v.co += normal * (depth * influence)
+
+
+def _data_mesh(name):
+    # Malhas auxiliares são guardadas pelo nome: referências a IDs não
+    # sobrevivem a um undo global
+    mesh = bpy.data.meshes.get(name)
+    return mesh if mesh is not None else bpy.data.meshes.new(name)
+
+
+def _fingerprint(bm):
+    # Identifica o estado da malha antes do bevel sem copiá-la: contagem de
+    # elementos, edges selecionadas e posições da região que o bevel lê (os
+    # vértices das faces em volta da seleção). Só é consultado em redo, em
+    # que o undo devolve a malha ao mesmo estado: é uma checagem extra
+    bm.verts.index_update()
+    selected = [e for e in bm.edges if e.select]
+    region = {v for e in selected for f in e.link_faces for v in f.verts}
+    region.update(v for e in selected for v in e.verts)
+    region = sorted(region, key=lambda v: v.index)
+    edges = np.array([[v.index for v in e.verts] for e in selected], dtype=np.int32)
+    index = np.fromiter((v.index for v in region), dtype=np.int32, count=len(region))
+    co = np.array([v.co[:] for v in region], dtype=np.float32)
+    counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+    return hash((counts, edges.tobytes(), index.tobytes(), co.tobytes()))
+
+
+class _BevelCache:
+    # Topologia chanfrada (antes do deslocamento) e buffers do depth pass de
+    # um objeto: mudar só depth ou profile no redo reaplica o deslocamento
+    def __init__(self):
+        self.key = None
+        self.mesh_name = bpy.data.meshes.new(".BevelRL_cache").name
+        self.indices = None
+        self.arrays = None
+
+    def matches(self, key):
+        return self.key == key and self.mesh_name in bpy.data.meshes
+
+    def store(self, key, bm, batch):
+        mesh = _data_mesh(self.mesh_name)
+        self.mesh_name = mesh.name
+        bm.verts.index_update()
+        bm.to_mesh(mesh)
+        self.key = key
+        self.indices = None
+        if batch is not None:
+            verts, *self.arrays = batch
+            self.indices = [v.index for v in verts]
+
+    def restore(self, bm):
+        bm.clear()
+        bm.from_mesh(bpy.data.meshes[self.mesh_name])
+        if self.indices is None:
+            return None
+        bm.verts.ensure_lookup_table()
+        return ([bm.verts[i] for i in self.indices], *self.arrays)
+
+
+def _drop_cache(name):
+    entry = _cache.pop(name, None)
+    if entry is None:
+        return
+    mesh = bpy.data.meshes.get(entry.mesh_name)
+    if mesh is not None:
+        bpy.data.meshes.remove(mesh)
+
+
+def _clear_cache():
+    for name in list(_cache):
+        _drop_cache(name)
+    # Cópias de um modal interrompido sem passar pelo cancel
+    for mesh in [m for m in bpy.data.meshes if m.name.startswith(_UNDO_MESH)]:
+        bpy.data.meshes.remove(mesh)
+
+
+def _iter_region_normal_update(verts):
+    # Normais só da região editada: as faces ligadas aos vértices dados e os
+    # vértices dessas faces (um anel de vizinhos). As faces de fora não mudaram,
+    # então as normais dos vértices do anel ficam corretas. Um yield por item,
+    # para o operador modal poder fatiar
+    faces = set()
+    for v in verts:
+        faces.update(v.link_faces)
+        yield
+    ring = set()
+    for f in faces:
+        f.normal_update()
+        ring.update(f.verts)
+        yield
+    for v in ring:
+        v.normal_update()
+        yield
+
+
+def _region_normal_update(verts):
+    for _ in _iter_region_normal_update(verts):
+        pass
+
+
+def _edit_objects(context):
+    obj = context.active_object
+    if obj is None or obj.mode != 'EDIT':
+        return []
+    objects = getattr(context, "objects_in_mode_unique_data", None) or [obj]
+    return [o for o in objects if o.type == 'MESH']
+
+
+class _BevelJob:
+    # Estado de um objeto durante uma execução do operador
+    def __init__(self, obj):
+        self.obj = obj
+        self.timings = {}
+        self.bm = bmesh.from_edit_mesh(obj.data)
+        self.midpoints = []
+        self.fingerprint = None
+        self.matches = []
+        self.batch = None
+        self.beveled = False
+        self.displaced = False
+
+    def add_time(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    def normal_update(self, verts=None):
+        # Sem vértices, recalcula a malha inteira (só o modo de referência)
+        t_start = time.perf_counter()
+        if verts is None:
+            self.bm.normal_update()
+        else:
+            _region_normal_update(verts)
+        self.add_time("normals", time.perf_counter() - t_start)
+
+    def matched_verts(self):
+        return {v for e, _ in self.matches for v in e.verts}
+
+
+def _bevel_rails(faces, layer, source_pairs, segments):
+    # Devolve (edge, t) para cada edge longitudinal gerada pelo bevel, com t
+    # sendo a posição exata no perfil (0 = borda, 1 = centro)
+    bevel_faces = set(faces)
+
+    # Trilhos: edges das faces do bevel que ligam vértices vindos das duas
+    # pontas de uma mesma edge de origem
+    rails = set()
+    for f in faces:
+        for e in f.edges:
+            if frozenset((e.verts[0][layer], e.verts[1][layer])) in source_pairs:
+                rails.add(e)
+
+    # Trilhos de borda encostam em faces que não são do bevel
+    frontier = [
+        e for e in rails
+        if len(e.link_faces) < 2 or any(f not in bevel_faces for f in e.link_faces)
+    ]
+    level = dict.fromkeys(frontier, 0)
+
+    # Atravessa os quads da faixa, de trilho em trilho, a partir das bordas
+    while frontier:
+        next_frontier = []
+        for e in frontier:
+            for loop in e.link_loops:
+                if loop.face not in bevel_faces or len(loop.face.verts) != 4:
+                    continue
+                opposite = loop.link_loop_next.link_loop_next.edge
+                if opposite in rails and opposite not in level:
+                    level[opposite] = level[e] + 1
+                    next_frontier.append(opposite)
+        frontier = next_frontier
+
+    half = segments / 2.0
+    return [(e, min(1.0, lvl / half)) for e, lvl in level.items()]
+
+
+class _BevelRL:
+    # Propriedades e etapas compartilhadas pelo operador direto e pelo modal
 
     segments: bpy.props.IntProperty(
         name="Segmentos",
@@ -48,68 +381,749 @@ class BevelRL_OT_edge_bevel(bpy.types.Operator):
         max=3.0,
         precision=3,
     )
+    profile_type: bpy.props.EnumProperty(
+        name="Tipo de Perfil",
+        description="Curva usada para o deslocamento",
+        items=(
+            ('SUPERELLIPSE', "Superelipse", "Perfil (1 - |1 - t|^p)^(1/p)"),
+            ('CURVE', "Curva", "Curva customizada editada no painel"),
+        ),
+        default='SUPERELLIPSE',
+    )
+    engine: bpy.props.EnumProperty(
+        name="Motor",
+        description="Como o bevel é aplicado e como as edges geradas são encontradas",
+        items=(
+            ('OPERATOR', "Operador", "bpy.ops.mesh.bevel seguido de busca por proximidade"),
+            ('BMESH', "BMesh", "bmesh.ops.bevel com rastreamento da topologia gerada"),
+        ),
+        default='OPERATOR',
+    )
+    depth_mode: bpy.props.EnumProperty(
+        name="Deslocamento",
+        description="Como a profundidade extra é aplicada",
+        items=(
+            ('VECTOR', "Vetorizado", "Deslocamento em lote com NumPy, um por vértice"),
+            ('LOOP', "Referência", "Laço original, uma edge por vez, para comparar resultados"),
+        ),
+        default='VECTOR',
+    )
+    measure_serial: bpy.props.BoolProperty(
+        name="Medir Sequencial",
+        description="Roda a matemática dos objetos de novo, um após o outro, para medir o ganho do pool",
+        default=False,
+    )
 
     def execute(self, context):
-        obj = context.active_object
-        if obj is None or obj.mode != 'EDIT':
+        objects = _edit_objects(context)
+        if not objects:
             self.report({'WARNING'}, "O objeto ativo deve estar no modo de edição (Edit Mode)")
             return {'CANCELLED'}
 
-        bm = bmesh.from_edit_mesh(obj.data)
-        bm.normal_update()
+        jobs = [_BevelJob(obj) for obj in objects]
+
+        # Cache para o painel de redo: partindo da mesma malha e com os mesmos
+        # segments/offset, o bevel e a busca dão o mesmo resultado e só o
+        # deslocamento precisa ser refeito. Só um redo parte garantidamente da
+        # mesma malha; fora dele a entrada antiga é descartada, para nunca
+        # trocar a malha do usuário (posições, UVs, atributos) por uma cópia velha
+        repeat = self.options.is_repeat
+        if not repeat:
+            for job in jobs:
+                _drop_cache(job.obj.data.name)
+        use_cache = self.depth_mode == 'VECTOR' and self.depth != 0
+        key = (self.engine, self.segments, self.offset)
+        if use_cache:
+            for job in jobs:
+                t_start = time.perf_counter()
+                job.fingerprint = _fingerprint(job.bm)
+                job.add_time("cache", time.perf_counter() - t_start)
+
+        if use_cache and repeat and all(
+            job.obj.data.name in _cache and _cache[job.obj.data.name].matches(key + (job.fingerprint,))
+            for job in jobs
+        ):
+            for job in jobs:
+                t_start = time.perf_counter()
+                job.batch = _cache[job.obj.data.name].restore(job.bm)
+                job.beveled = True
+                job.add_time("cache", time.perf_counter() - t_start)
+        else:
+            if self.engine == 'BMESH':
+                for job in jobs:
+                    self._bevel_bmesh(job)
+            else:
+                self._bevel_operator(jobs)
 
+            if use_cache:
+                for job in jobs:
+                    t_start = time.perf_counter()
+                    if job.matches:
+                        job.batch = _gather(job.matches)
+                    entry = _cache.setdefault(job.obj.data.name, _BevelCache())
+                    entry.store(key + (job.fingerprint,), job.bm, job.batch)
+                    job.timings["snapshot"] = time.perf_counter() - t_start
+
+        pool_wall, serial = 0.0, None
+        if self.depth != 0:
+            pool_wall, serial = self._depth_pass(jobs)
+
+        for job in jobs:
+            # bpy.ops.mesh.bevel já sincroniza a malha quando não há deslocamento.
+            # Se a topologia veio do operador, só as posições mudaram: a
+            # sincronização não precisa ser destrutiva
+            if job.beveled or job.displaced:
+                t_start = time.perf_counter()
+                bmesh.update_edit_mesh(job.obj.data, loop_triangles=True, destructive=job.beveled)
+                job.timings["sync"] = time.perf_counter() - t_start
+
+        last_timings.clear()
+        last_timings.update((job.obj.name, dict(job.timings)) for job in jobs)
+        self._report_timings(jobs, pool_wall, serial)
+        return {'FINISHED'}
+
+    def _bevel_operator(self, jobs):
         # Salva pontos médios originais
-        original_midpoints = []
-        for e in bm.edges:
-            if e.select:
-                mid = (e.verts[0].co + e.verts[1].co) / 2
-                original_midpoints.append(mid.copy())
+        for job in jobs:
+            t_start = time.perf_counter()
+            job.midpoints = [_edge_midpoint(e) for e in job.bm.edges if e.select]
+            job.add_time("capture", time.perf_counter() - t_start)
 
-        # Aplica bevel
+        # Aplica bevel (o operador age em todos os objetos em modo de edição)
+        t_start = time.perf_counter()
         bpy.ops.mesh.bevel(
             offset=self.offset,
             segments=self.segments,
             affect='EDGES',
             clamp_overlap=True,
         )
+        # Uma chamada para todos os objetos: cada um recebe o tempo total
+        elapsed = time.perf_counter() - t_start
+        for job in jobs:
+            job.add_time("bevel", elapsed)
+
+        if self.depth == 0:
+            return
+
+        radius = self.offset * 1.5
+        for job in jobs:
+            if not job.midpoints:
+                continue
+
+            job.bm = bmesh.from_edit_mesh(job.obj.data)
+            if self.depth_mode == 'LOOP':
+                # A referência busca e desloca junto, então precisa das normais
+                # da malha inteira antes de começar
+                job.normal_update()
+
+            # Índice espacial dos pontos médios pós-bevel (construído uma vez)
+            t_start = time.perf_counter()
+            edges, tree = _midpoint_tree(job.bm)
+            t_index = time.perf_counter()
+
+            if self.depth_mode == 'LOOP':
+                moved = self._depth_loop(edges, tree, job.midpoints, radius)
+                job.displaced = True
+            else:
+                job.matches = _proximity_matches(edges, tree, job.midpoints, radius)
+            t_query = time.perf_counter()
+
+            job.timings["index"] = t_index - t_start
+            job.timings["query"] = t_query - t_index
+            if job.matches:
+                job.normal_update(job.matched_verts())
+            elif job.displaced:
+                job.normal_update(moved)
+
+    def _depth_loop(self, edges, tree, midpoints, radius):
+        # Modo de referência do motor por proximidade: cada ponto médio busca e
+        # desloca em sequência, então as buscas seguintes veem os vértices já
+        # movidos. drift é o maior deslocamento acumulado de um vértice: os
+        # pontos médios indexados podem estar até essa distância da posição atual
+        drift = 0.0
+        moved = {}
+        table = self._curve_table()
+
+        for mid in midpoints:
+            # Encontra edges criadas pelo bevel
+            all_edges = _find_near(edges, tree, mid, radius, drift)
 
-        if self.depth != 0 and original_midpoints:
-            bm = bmesh.from_edit_mesh(obj.data)
-            bm.normal_update()
+            if not all_edges:
+                continue
 
-            for mid in original_midpoints:
-                # Encontra edges criadas pelo bevel
-                all_edges = []
-                for e in bm.edges:
-                    edge_mid = (e.verts[0].co + e.verts[1].co) / 2
-                    dist = (edge_mid - mid).length
-                    if dist < self.offset * 1.5:
-                        all_edges.append((e, dist))
+            # Distância máxima para normalizar
+            max_dist = max(d for _, d in all_edges) or 1e-6
 
-                if not all_edges:
+            for e, dist in all_edges:
+                # Fator t (0 = borda, 1 = centro)
+                t = 1.0 - (dist / max_dist)
+                influence = _influence(t, self.profile, table)
+
+                if influence <= 0:
                     continue
 
-                # Distância máxima para normalizar
-                max_dist = max(d for _, d in all_edges) or 1e-6
+                normal = (e.verts[0].normal + e.verts[1].normal).normalized()
+                step = self.depth * influence
+                for v in e.verts:
+                    v.co += normal * step
+                    moved[v] = moved.get(v, 0.0) + abs(step)
+                    drift = max(drift, moved[v])
 
-                for e, dist in all_edges:
-                    # Fator t (0 = borda, 1 = centro)
-                    t = 1.0 - (dist / max_dist)
-                    # Curva superelipse
-                    influence = (1.0 - abs(1.0 - t) ** self.profile) ** (1.0 / self.profile)
+        return moved
 
-                    if influence <= 0:
-                        continue
+    def _bevel_bmesh(self, job):
+        bm = job.bm
+        t_start = time.perf_counter()
+        source_edges = [e for e in bm.edges if e.select]
+        if not source_edges:
+            return
 
-                    normal = (e.verts[0].normal + e.verts[1].normal).normalized()
-                    for v in e.verts:
-                        v.co += normal * (self.depth * influence)
+        # Marca os vértices de origem: o bevel copia essa camada para todo
+        # vértice que cria a partir deles, então cada edge gerada sabe de qual
+        # edge selecionada veio
+        layer = bm.verts.layers.int.new(_SOURCE_LAYER)
+        source_verts = list({v for e in source_edges for v in e.verts})
+        for i, v in enumerate(source_verts, 1):
+            v[layer] = i
+        source_pairs = {frozenset((e.verts[0][layer], e.verts[1][layer])) for e in source_edges}
+        job.add_time("capture", time.perf_counter() - t_start)
 
-            bmesh.update_edit_mesh(obj.data)
+        # O bevel usa as normais das faces em volta das edges selecionadas
+        job.normal_update(source_verts)
 
-        return {'FINISHED'}
+        t_start = time.perf_counter()
+        # Os padrões de bpy.ops.mesh.bevel onde os slots do bmesh.ops diferem
+        # (loop_slide, material, spread): trocar de motor só muda a busca
+        result = bmesh.ops.bevel(
+            bm,
+            geom=source_verts + source_edges,
+            offset=self.offset,
+            offset_type='OFFSET',
+            profile_type='SUPERELLIPSE',
+            segments=self.segments,
+            profile=0.5,
+            affect='EDGES',
+            clamp_overlap=True,
+            loop_slide=True,
+            material=-1,
+            miter_outer='SHARP',
+            miter_inner='SHARP',
+            spread=0.1,
+            vmesh_method='ADJ',
+        )
+        for f in result["faces"]:
+            f.select_set(True)
+        job.beveled = True
+        job.add_time("bevel", time.perf_counter() - t_start)
+
+        if self.depth != 0:
+            t_start = time.perf_counter()
+            job.matches = _bevel_rails(result["faces"], layer, source_pairs, self.segments)
+            job.add_time("rails", time.perf_counter() - t_start)
+            job.normal_update(job.matched_verts())
+
+        bm.verts.layers.int.remove(layer)
+
+    def _depth_pass(self, jobs):
+        if self.depth_mode == 'LOOP':
+            if self.engine == 'BMESH':
+                for job in jobs:
+                    t_start = time.perf_counter()
+                    _apply_depth_loop(job.matches, self.depth, self.profile, self._curve_table())
+                    job.displaced = True
+                    job.timings["depth"] = time.perf_counter() - t_start
+                    job.normal_update(job.matched_verts())
+            return 0.0, None
+
+        # Leitura da BMesh na thread principal, matemática no pool de threads
+        # com buffers planos, escrita de volta na thread principal
+        batches = []
+        for job in jobs:
+            if job.batch is None and job.matches:
+                t_start = time.perf_counter()
+                job.batch = _gather(job.matches)
+                job.timings["read"] = time.perf_counter() - t_start
+            if job.batch is not None:
+                batches.append((job, job.batch))
+        if not batches:
+            return 0.0, None
+
+        table = _profile_table(self.profile_type, self.profile)
+        args = [(coords, normals, edge_verts, t, self.depth, table)
+                for _, (_, coords, normals, edge_verts, t) in batches]
+        serial = None
+        if len(batches) == 1:
+            t_start = time.perf_counter()
+            results = [_timed_displace(*args[0])]
+            wall = time.perf_counter() - t_start
+        else:
+            # O tempo do pool não inclui criar nem encerrar as threads
+            with ThreadPoolExecutor(max_workers=min(len(batches), os.cpu_count() or 1)) as pool:
+                t_start = time.perf_counter()
+                results = list(pool.map(lambda a: _timed_displace(*a), args))
+                wall = time.perf_counter() - t_start
+            if self.measure_serial:
+                # Referência real: as mesmas tarefas, uma após a outra, sem o
+                # pool; _displace não altera as entradas
+                t_start = time.perf_counter()
+                for a in args:
+                    _timed_displace(*a)
+                serial = time.perf_counter() - t_start
 
+        for (job, (verts, *_)), (coords, elapsed) in zip(batches, results):
+            job.timings["math"] = elapsed
+            t_start = time.perf_counter()
+            _write_coords(verts, coords)
+            job.displaced = True
+            job.timings["write"] = time.perf_counter() - t_start
+            # Só os vértices deslocados e o anel em volta mudam de normal
+            job.normal_update(verts)
 
+        return wall, serial
+
+    def _curve_table(self):
+        # A referência mantém a superelipse exata; só a curva usa a tabela
+        if self.profile_type == 'CURVE':
+            return _profile_table(self.profile_type, self.profile)
+        return None
+
+    def _report_timings(self, jobs, wall, serial=None):
+        for job in jobs:
+            if job.timings:
+                self.report({'INFO'}, "%s: %s" % (job.obj.name, ", ".join(
+                    "%s %.1f ms" % (name, seconds * 1000.0) for name, seconds in job.timings.items()
+                )))
+
+        # Ganho do pool contra a matemática dos objetos um após o outro, só
+        # quando medido de verdade (Medir Sequencial)
+        if wall > 0.0 and serial is not None:
+            self.report({'INFO'}, "%d objetos: pool %.1f ms, sequencial %.1f ms (%.1fx)" % (
+                len(jobs), wall * 1000.0, serial * 1000.0, serial / wall,
+            ))
+        elif wall > 0.0:
+            self.report({'INFO'}, "%d objetos: pool %.1f ms (sequencial não medido)" % (len(jobs), wall * 1000.0))
+
+
+class BevelRL_OT_edge_bevel(_BevelRL, bpy.types.Operator):
+    bl_idname = "object.edge_bevel_custom"
+    bl_label = "Aplicar Bevel"
+    bl_options = {'REGISTER', 'UNDO'}
+
+
+# Tempo de cálculo por evento do timer: abaixo de um quadro a 60 fps
+_FRAME_BUDGET = 0.012
+_UNDO_MESH = ".BevelRL_undo"
+
+# Etapas do depth pass no modal (índice, busca, normais, leitura das edges,
+# leitura dos vértices, escrita, normais), para a barra de progresso
+_STAGES = 7
+
+# Eventos que continuam indo para a viewport enquanto o modal roda
+_NAVIGATION = {
+    'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'NDOF_MOTION',
+}
+
+
+class BevelRL_OT_edge_bevel_modal(_BevelRL, bpy.types.Operator):
+    bl_idname = "object.edge_bevel_modal"
+    bl_label = "Aplicar Bevel (Modal)"
+    bl_description = "Aplica o bevel em fatias com barra de progresso; Esc desfaz"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def invoke(self, context, event):
+        objects = _edit_objects(context)
+        # Uma nova aplicação: o cache de um bevel anterior não vale mais
+        for obj in objects:
+            _drop_cache(obj.data.name)
+        # Sem deslocamento não há o que fatiar; a referência roda direto
+        if not objects or self.depth == 0 or self.depth_mode == 'LOOP':
+            return self.execute(context)
+
+        self._jobs = [_BevelJob(obj) for obj in objects]
+
+        # Malha original de cada objeto, para o Esc deixar tudo como estava
+        self._snapshots = []
+        for job in self._jobs:
+            mesh = bpy.data.meshes.new(_UNDO_MESH)
+            job.bm.to_mesh(mesh)
+            self._snapshots.append(mesh.name)
+
+        if self.engine == 'OPERATOR':
+            for job in self._jobs:
+                job.midpoints = [_edge_midpoint(e) for e in job.bm.edges if e.select]
+            bpy.ops.mesh.bevel(
+                offset=self.offset,
+                segments=self.segments,
+                affect='EDGES',
+                clamp_overlap=True,
+            )
+
+        self._steps = self._modal_steps()
+        self._chunk = 64
+        self._slices = 0
+        self._busy = 0.0
+        self._started = time.perf_counter()
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'INFO'}, "Bevel cancelado")
+            return {'CANCELLED'}
+        if event.type in _NAVIGATION:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER' or event.timer != self._timer:
+            return {'RUNNING_MODAL'}
+
+        # Uma fatia: roda self._chunk passos e ajusta o tamanho pelo custo
+        # medido por passo, para a próxima caber no orçamento do quadro
+        t_start = time.perf_counter()
+        done = 0
+        progress = 0.0
+        try:
+            for progress in itertools.islice(self._steps, self._chunk):
+                done += 1
+        except Exception:
+            self.cancel(context)
+            raise
+        elapsed = time.perf_counter() - t_start
+        self._busy += elapsed
+        self._slices += 1
+
+        if done < self._chunk:
+            self._finish(context)
+            self.report({'INFO'}, "%d fatias, cálculo %.1f ms, total %.1f ms" % (
+                self._slices, self._busy * 1000.0, (time.perf_counter() - self._started) * 1000.0,
+            ))
+            return {'FINISHED'}
+
+        per_step = elapsed / done
+        limit = int(_FRAME_BUDGET / per_step) if per_step > 0.0 else self._chunk * 4
+        self._chunk = max(1, min(self._chunk * 4, limit))
+        context.window_manager.progress_update(int(progress * 100.0))
+        return {'RUNNING_MODAL'}
+
+    def cancel(self, context):
+        # Volta cada objeto para a malha de antes do bevel
+        for job, name in zip(self._jobs, self._snapshots):
+            bm = bmesh.from_edit_mesh(job.obj.data)
+            bm.clear()
+            bm.from_mesh(bpy.data.meshes[name])
+            bmesh.update_edit_mesh(job.obj.data, loop_triangles=True, destructive=True)
+        self._end(context)
+
+    def _finish(self, context):
+        for job in self._jobs:
+            if job.beveled or job.displaced:
+                bmesh.update_edit_mesh(job.obj.data, loop_triangles=True, destructive=job.beveled)
+        self._end(context)
+
+    def _end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        for name in self._snapshots:
+            mesh = bpy.data.meshes.get(name)
+            if mesh is not None:
+                bpy.data.meshes.remove(mesh)
+        self._snapshots = []
+
+    def _modal_steps(self):
+        # O depth pass inteiro como gerador: cada yield é uma edge ou vértice
+        # processado e devolve o progresso geral (0..1)
+        table = _profile_table(self.profile_type, self.profile)
+        count = len(self._jobs)
+        for n, job in enumerate(self._jobs):
+            for stage, i, total in self._job_steps(job, table):
+                yield (n + (stage + i / max(total, 1)) / _STAGES) / count
+
+    def _job_steps(self, job, table):
+        if self.engine == 'BMESH':
+            self._bevel_bmesh(job)
+            yield 1, 0, 1
+        elif job.midpoints:
+            job.bm = bmesh.from_edit_mesh(job.obj.data)
+
+            # Índice espacial dos pontos médios pós-bevel
+            edges = list(job.bm.edges)
+            tree = kdtree.KDTree(len(edges))
+            for i, e in enumerate(edges):
+                tree.insert(_edge_midpoint(e), i)
+                yield 0, i, len(edges)
+            tree.balance()
+
+            radius = self.offset * 1.5
+            for i, mid in enumerate(job.midpoints):
+                job.matches.extend(_proximity_matches(edges, tree, [mid], radius))
+                yield 1, i, len(job.midpoints)
+
+            for _ in _iter_region_normal_update(job.matched_verts()):
+                yield 2, 0, 1
+
+        if not job.matches:
+            return
+
+        # Mesma leitura de _gather, um vértice por passo
+        index = {}
+        edge_verts = np.empty((len(job.matches), 2), dtype=np.int32)
+        for k, (e, _) in enumerate(job.matches):
+            edge_verts[k, 0] = index.setdefault(e.verts[0], len(index))
+            edge_verts[k, 1] = index.setdefault(e.verts[1], len(index))
+            yield 3, k, len(job.matches)
+        verts = list(index)
+        coords = np.empty((len(verts), 3), dtype=np.float32)
+        normals = np.empty((len(verts), 3), dtype=np.float32)
+        for i, v in enumerate(verts):
+            coords[i] = v.co
+            normals[i] = v.normal
+            yield 4, i, len(verts)
+        t = np.fromiter((t for _, t in job.matches), dtype=np.float32, count=len(job.matches))
+
+        coords = _displace(coords, normals, edge_verts, t, self.depth, table).tolist()
+        for i, v in enumerate(verts):
+            v.co = coords[i]
+            job.displaced = True
+            yield 5, i, len(verts)
+
+        for _ in _iter_region_normal_update(verts):
+            yield 6, 0, 1
+
+
+_REST_GROUP = ".BevelRL Rest"
+_DEPTH_GROUP = "BevelRL Depth"
+_REST_ATTRIBUTE = "bevel_rl_rest"
+
+
+def _group_socket(group, in_out, socket_type, name):
+    # Blender 4.0 trocou group.inputs/outputs por group.interface
+    if hasattr(group, "interface"):
+        return group.interface.new_socket(name, in_out=in_out, socket_type=socket_type)
+    sockets = group.inputs if in_out == 'INPUT' else group.outputs
+    return sockets.new(socket_type, name)
+
+
+def _input_identifier(group, name):
+    if hasattr(group, "interface"):
+        for item in group.interface.items_tree:
+            if item.item_type == 'SOCKET' and item.in_out == 'INPUT' and item.name == name:
+                return item.identifier
+        return None
+    return group.inputs[name].identifier
+
+
+def _typed(sockets, name):
+    # Nodes com data_type têm um socket por tipo com o mesmo nome até o 4.0;
+    # só o do tipo escolhido fica habilitado
+    return next(s for s in sockets if s.name == name and s.enabled)
+
+
+class _NodeBuilder:
+    def __init__(self, group):
+        self.nodes = group.nodes
+        self.links = group.links
+
+    def node(self, idname, **props):
+        node = self.nodes.new(idname)
+        for name, value in props.items():
+            setattr(node, name, value)
+        return node
+
+    def feed(self, socket, value):
+        if isinstance(value, bpy.types.NodeSocket):
+            self.links.new(value, socket)
+        else:
+            socket.default_value = value
+
+    def math(self, operation, a, b=None, clamp=False):
+        node = self.node('ShaderNodeMath', operation=operation, use_clamp=clamp)
+        self.feed(node.inputs[0], a)
+        if b is not None:
+            self.feed(node.inputs[1], b)
+        return node.outputs[0]
+
+    def vmath(self, operation, a, b=None, scale=None):
+        node = self.node('ShaderNodeVectorMath', operation=operation)
+        self.feed(node.inputs[0], a)
+        if b is not None:
+            self.feed(node.inputs[1], b)
+        if scale is not None:
+            self.feed(node.inputs["Scale"], scale)
+        return node.outputs["Value" if operation == 'LENGTH' else "Vector"]
+
+    def at_index(self, value, index, data_type='FLOAT_VECTOR'):
+        node = self.node('GeometryNodeFieldAtIndex', domain='POINT', data_type=data_type)
+        self.feed(_typed(node.inputs, "Value"), value)
+        self.feed(node.inputs["Index"], index)
+        return _typed(node.outputs, "Value")
+
+    def on_domain(self, value, domain, data_type):
+        node = self.node('GeometryNodeFieldOnDomain', domain=domain, data_type=data_type)
+        self.feed(_typed(node.inputs, "Value"), value)
+        return _typed(node.outputs, "Value")
+
+
+def _rest_group():
+    # Antes do Bevel: guarda a posição original de cada vértice. O Bevel copia
+    # o atributo para os vértices que cria a partir dele
+    group = bpy.data.node_groups.get(_REST_GROUP)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(_REST_GROUP, 'GeometryNodeTree')
+    _group_socket(group, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    _group_socket(group, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+
+    nb = _NodeBuilder(group)
+    group_in = nb.node('NodeGroupInput')
+    group_out = nb.node('NodeGroupOutput')
+    store = nb.node('GeometryNodeStoreNamedAttribute', data_type='FLOAT_VECTOR', domain='POINT')
+    nb.feed(store.inputs["Name"], _REST_ATTRIBUTE)
+    nb.feed(_typed(store.inputs, "Value"), nb.node('GeometryNodeInputPosition').outputs[0])
+    nb.feed(store.inputs[0], group_in.outputs[0])
+    nb.feed(group_out.inputs[0], store.outputs[0])
+    return group
+
+
+def _depth_group():
+    # Depois do Bevel: o mesmo critério do motor por proximidade, avaliado
+    # como campo. Uma edge do bevel liga vértices vindos das duas pontas de
+    # uma edge original; a distância do seu ponto médio ao ponto médio
+    # original dá t, e cada vértice recebe a média das edges que o empurram
+    group = bpy.data.node_groups.get(_DEPTH_GROUP)
+    if group is not None:
+        return group
+
+    group = bpy.data.node_groups.new(_DEPTH_GROUP, 'GeometryNodeTree')
+    _group_socket(group, 'INPUT', 'NodeSocketGeometry', "Geometry")
+    _group_socket(group, 'INPUT', 'NodeSocketFloat', "Width")
+    _group_socket(group, 'INPUT', 'NodeSocketFloat', "Depth")
+    _group_socket(group, 'INPUT', 'NodeSocketFloat', "Profile")
+    _group_socket(group, 'OUTPUT', 'NodeSocketGeometry', "Geometry")
+
+    nb = _NodeBuilder(group)
+    group_in = nb.node('NodeGroupInput')
+    group_out = nb.node('NodeGroupOutput')
+    width = group_in.outputs["Width"]
+    depth = group_in.outputs["Depth"]
+    profile = group_in.outputs["Profile"]
+    eps = nb.math('MULTIPLY', width, 0.001)
+
+    rest = nb.node('GeometryNodeInputNamedAttribute', data_type='FLOAT_VECTOR')
+    nb.feed(rest.inputs["Name"], _REST_ATTRIBUTE)
+    rest = _typed(rest.outputs, "Attribute")
+    normal = nb.node('GeometryNodeInputNormal').outputs[0]
+    edge = nb.node('GeometryNodeInputMeshEdgeVertices')
+
+    # Campos no domínio de edge
+    p1, p2 = edge.outputs["Position 1"], edge.outputs["Position 2"]
+    r1 = nb.at_index(rest, edge.outputs["Vertex Index 1"])
+    r2 = nb.at_index(rest, edge.outputs["Vertex Index 2"])
+    moved1 = nb.math('GREATER_THAN', nb.vmath('LENGTH', nb.vmath('SUBTRACT', p1, r1)), eps)
+    moved2 = nb.math('GREATER_THAN', nb.vmath('LENGTH', nb.vmath('SUBTRACT', p2, r2)), eps)
+    span = nb.math('GREATER_THAN', nb.vmath('LENGTH', nb.vmath('SUBTRACT', r1, r2)), eps)
+
+    mid = nb.vmath('SCALE', nb.vmath('ADD', p1, p2), scale=0.5)
+    rest_mid = nb.vmath('SCALE', nb.vmath('ADD', r1, r2), scale=0.5)
+    dist = nb.vmath('LENGTH', nb.vmath('SUBTRACT', mid, rest_mid))
+    near = nb.math('LESS_THAN', dist, nb.math('MULTIPLY', width, 1.5))
+
+    # Fator t (0 = borda, 1 = centro) e curva superelipse
+    t = nb.math('SUBTRACT', 1.0, nb.math('DIVIDE', dist, width), clamp=True)
+    influence = nb.math('POWER', nb.math('SUBTRACT', 1.0, nb.math('POWER', nb.math('SUBTRACT', 1.0, t), profile)),
+                        nb.math('DIVIDE', 1.0, profile))
+    weight = nb.math('MULTIPLY', nb.math('MULTIPLY', moved1, moved2), nb.math('MULTIPLY', span, near))
+    weight = nb.math('MULTIPLY', weight, nb.math('GREATER_THAN', influence, 0.0))
+
+    n1 = nb.at_index(normal, edge.outputs["Vertex Index 1"])
+    n2 = nb.at_index(normal, edge.outputs["Vertex Index 2"])
+    edge_normal = nb.vmath('NORMALIZE', nb.vmath('ADD', n1, n2))
+    push = nb.vmath('SCALE', edge_normal, scale=nb.math('MULTIPLY', depth, nb.math('MULTIPLY', influence, weight)))
+
+    # De volta aos vértices: média das edges que empurram cada um
+    push = nb.on_domain(push, 'EDGE', 'FLOAT_VECTOR')
+    count = nb.math('MAXIMUM', nb.on_domain(weight, 'EDGE', 'FLOAT'), 1e-6)
+    offset = nb.vmath('SCALE', push, scale=nb.math('DIVIDE', 1.0, count))
+
+    set_position = nb.node('GeometryNodeSetPosition')
+    nb.feed(set_position.inputs["Geometry"], group_in.outputs[0])
+    nb.feed(set_position.inputs["Offset"], offset)
+    nb.feed(group_out.inputs[0], set_position.outputs[0])
+    return group
+
+
+def _drive(obj, data_path, scene, prop):
+    # Driver simples: o valor segue scene.bevel_rl_props.<prop>
+    driver = obj.driver_add(data_path).driver
+    driver.type = 'AVERAGE'
+    var = driver.variables[0] if driver.variables else driver.variables.new()
+    var.type = 'SINGLE_PROP'
+    var.targets[0].id_type = 'SCENE'
+    var.targets[0].id = scene
+    var.targets[0].data_path = "bevel_rl_props." + prop
+
+
+def _mark_bevel_weight(obj):
+    bm = bmesh.from_edit_mesh(obj.data)
+    if bpy.app.version >= (4, 0, 0):
+        layer = bm.edges.layers.float.get("bevel_weight_edge") or bm.edges.layers.float.new("bevel_weight_edge")
+    else:
+        layer = bm.edges.layers.bevel_weight.verify()
+    for e in bm.edges:
+        if e.select:
+            e[layer] = 1.0
+    bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+
+class BevelRL_OT_modifier(bpy.types.Operator):
+    bl_idname = "object.bevel_rl_modifier"
+    bl_label = "Bevel RL Não Destrutivo"
+    bl_description = "Cria Bevel + Geometry Nodes guiados pelos valores do painel"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        obj = context.active_object
+        if obj is not None and obj.mode == 'EDIT':
+            # Em Edit Mode as edges selecionadas recebem bevel weight
+            objects = _edit_objects(context)
+            for o in objects:
+                _mark_bevel_weight(o)
+        else:
+            objects = [o for o in context.selected_objects if o.type == 'MESH']
+
+        if not objects:
+            self.report({'WARNING'}, "Nenhuma malha selecionada")
+            return {'CANCELLED'}
+
+        # Os node groups são gerados uma vez e compartilhados por todos os objetos
+        rest_group = _rest_group()
+        depth_group = _depth_group()
+        scene = context.scene
+
+        for o in objects:
+            rest = o.modifiers.get("BevelRL Rest") or o.modifiers.new("BevelRL Rest", 'NODES')
+            rest.node_group = rest_group
+
+            bevel = o.modifiers.get("BevelRL Bevel") or o.modifiers.new("BevelRL Bevel", 'BEVEL')
+            bevel.affect = 'EDGES'
+            bevel.offset_type = 'OFFSET'
+            bevel.limit_method = 'WEIGHT'
+            bevel.use_clamp_overlap = True
+            _drive(o, 'modifiers["BevelRL Bevel"].width', scene, "offset")
+            _drive(o, 'modifiers["BevelRL Bevel"].segments', scene, "segments")
+
+            depth = o.modifiers.get("BevelRL Depth") or o.modifiers.new("BevelRL Depth", 'NODES')
+            depth.node_group = depth_group
+            for socket, prop in (("Width", "offset"), ("Depth", "depth"), ("Profile", "profile")):
+                identifier = _input_identifier(depth_group, socket)
+                _drive(o, 'modifiers["BevelRL Depth"]["%s"]' % identifier, scene, prop)
+
+        return {'FINISHED'}
 
 
 class BevelRL_PT_panel(bpy.types.Panel):
@@ -126,11 +1140,37 @@ class BevelRL_PT_panel(bpy.types.Panel):
         layout.prop(props, "segments")
         layout.prop(props, "offset")
         layout.prop(props, "depth")
-        op = layout.operator("object.edge_bevel_custom", text="Aplicar Bevel")
-        # passa valores do painel para o operador
-        op.segments = props.segments
-        op.offset = props.offset
-        op.depth = props.depth
+        layout.prop(props, "profile_type")
+        if props.profile_type == 'CURVE':
+            node = _profile_node()
+            if node is not None:
+                layout.template_curve_mapping(node, "mapping")
+        else:
+            layout.prop(props, "profile")
+        layout.prop(props, "engine")
+        layout.prop(props, "depth_mode")
+        layout.prop(props, "measure_serial")
+        for idname, text in (
+            ("object.edge_bevel_custom", "Aplicar Bevel"),
+            ("object.edge_bevel_modal", "Aplicar em Fatias (Esc cancela)"),
+        ):
+            op = layout.operator(idname, text=text)
+            # passa valores do painel para o operador
+            op.segments = props.segments
+            op.offset = props.offset
+            op.depth = props.depth
+            op.profile = props.profile
+            op.profile_type = props.profile_type
+            op.engine = props.engine
+            op.depth_mode = props.depth_mode
+            op.measure_serial = props.measure_serial
+        layout.operator("object.bevel_rl_modifier", text="Modificador (Não Destrutivo)")
+
+
+def _profile_type_update(self, context):
+    # O painel não pode criar dados ao desenhar: cria a curva ao escolher o tipo
+    if self.profile_type == 'CURVE':
+        _profile_node(create=True)
 
 
 class BevelRL_Properties(bpy.types.PropertyGroup):
@@ -157,17 +1197,63 @@ class BevelRL_Properties(bpy.types.PropertyGroup):
         max=1.0,
         precision=3,
     )
+    profile: bpy.props.FloatProperty(
+        name="Profile",
+        description="Formato da curva do deslocamento (superelipse)",
+        default=1.0,
+        min=0.1,
+        max=3.0,
+        precision=3,
+    )
+    profile_type: bpy.props.EnumProperty(
+        name="Tipo de Perfil",
+        description="Curva usada para o deslocamento",
+        items=(
+            ('SUPERELLIPSE', "Superelipse", "Perfil (1 - |1 - t|^p)^(1/p)"),
+            ('CURVE', "Curva", "Curva customizada editada no painel"),
+        ),
+        default='SUPERELLIPSE',
+        update=_profile_type_update,
+    )
+    engine: bpy.props.EnumProperty(
+        name="Motor",
+        description="Como o bevel é aplicado e como as edges geradas são encontradas",
+        items=(
+            ('OPERATOR', "Operador", "bpy.ops.mesh.bevel seguido de busca por proximidade"),
+            ('BMESH', "BMesh", "bmesh.ops.bevel com rastreamento da topologia gerada"),
+        ),
+        default='OPERATOR',
+    )
+    depth_mode: bpy.props.EnumProperty(
+        name="Deslocamento",
+        description="Como a profundidade extra é aplicada",
+        items=(
+            ('VECTOR', "Vetorizado", "Deslocamento em lote com NumPy, um por vértice"),
+            ('LOOP', "Referência", "Laço original, uma edge por vez, para comparar resultados"),
+        ),
+        default='VECTOR',
+    )
+    measure_serial: bpy.props.BoolProperty(
+        name="Medir Sequencial",
+        description="Roda a matemática dos objetos de novo, um após o outro, para medir o ganho do pool",
+        default=False,
+    )
 
 
 def register():
     bpy.utils.register_class(BevelRL_OT_edge_bevel)
+    bpy.utils.register_class(BevelRL_OT_edge_bevel_modal)
+    bpy.utils.register_class(BevelRL_OT_modifier)
     bpy.utils.register_class(BevelRL_PT_panel)
     bpy.utils.register_class(BevelRL_Properties)
     bpy.types.Scene.bevel_rl_props = bpy.props.PointerProperty(type=BevelRL_Properties)
 
 
 def unregister():
+    _clear_cache()
     bpy.utils.unregister_class(BevelRL_OT_edge_bevel)
+    bpy.utils.unregister_class(BevelRL_OT_edge_bevel_modal)
+    bpy.utils.unregister_class(BevelRL_OT_modifier)
     bpy.utils.unregister_class(BevelRL_PT_panel)
     bpy.utils.unregister_class(BevelRL_Properties)
     del bpy.types.Scene.bevel_rl_props
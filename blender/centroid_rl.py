@@ -0,0 +1,156 @@
+# Centros de seleção e índice de hierarquia compartilhados pelo QuickMenuRL.py
+# e pelo quick_menu_rl.py. Não é um add-on: os dois o importam no primeiro uso,
+# da pasta onde estão, e usam a mesma cópia do índice e do handler.
+
+import bpy
+import numpy as np
+from bpy.app.handlers import persistent
+from mathutils import Vector
+
+
+def vertex_centroid(objects, selected_only=True):
+    # Média dos vértices (selecionados ou todos) em espaço global, lendo
+    # select/co em lote. Em Edit Mode, update_from_editmode sincroniza a malha
+    # sem trocar de modo; malhas compartilhadas são lidas uma vez só
+    sums, counts, matrices = [], [], []
+    read = {}
+    for obj in objects:
+        mesh = obj.data
+        key = mesh.as_pointer()
+        if key not in read:
+            if obj.mode == 'EDIT':
+                obj.update_from_editmode()
+            n = len(mesh.vertices)
+            co = np.empty(n * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+            picked = co.reshape(-1, 3)
+            if selected_only:
+                select = np.empty(n, dtype=bool)
+                mesh.vertices.foreach_get("select", select)
+                picked = picked[select]
+            read[key] = (picked.sum(axis=0, dtype=np.float64), len(picked))
+        total, count = read[key]
+        if count:
+            sums.append(total)
+            counts.append(count)
+            matrices.append(obj.matrix_world)
+    if not counts:
+        return None
+
+    # Todas as matrix_world de uma vez: R @ soma + n * t, por objeto
+    matrices = np.array(matrices, dtype=np.float64)
+    counts = np.array(counts, dtype=np.float64)
+    world = np.einsum('kij,kj->ki', matrices[:, :3, :3], np.array(sums)) + counts[:, None] * matrices[:, :3, 3]
+    return Vector(world.sum(axis=0) / counts.sum())
+
+
+def bounds_center(objects):
+    # Centro da caixa envolvente global dos 8 cantos de bound_box de cada
+    # objeto: O(1) por objeto, sem ler vértices
+    if not objects:
+        return None
+    corners = np.array([o.bound_box for o in objects], dtype=np.float64)
+    matrices = np.array([o.matrix_world for o in objects], dtype=np.float64)
+    world = np.einsum('kij,kcj->kci', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+    world = world.reshape(-1, 3)
+    return Vector((world.min(axis=0) + world.max(axis=0)) / 2.0)
+
+
+# HIERARQUIA
+# Mapa pai -> filhos montado uma vez a partir de bpy.data.objects, com os
+# objetos identificados por as_pointer(): renomear não muda nada. O handler do
+# depsgraph descarta o mapa quando um objeto é criado, removido ou muda de pai
+_hierarchy = {"children": None, "parents": {}}
+
+
+def invalidate_hierarchy():
+    _hierarchy["children"] = None
+    _hierarchy["parents"].clear()
+
+
+def _hierarchy_children():
+    if _hierarchy["children"] is None:
+        install_handlers()
+        children = {}
+        parents = _hierarchy["parents"]
+        for obj in bpy.data.objects:
+            parent = obj.parent
+            parents[obj.as_pointer()] = parent.as_pointer() if parent else None
+            if parent is not None:
+                children.setdefault(parent.as_pointer(), []).append(obj)
+        _hierarchy["children"] = children
+    return _hierarchy["children"]
+
+
+def hierarchy_root(obj):
+    # Sobe enquanto o nome segue a convenção "_" de objeto filho; depende do
+    # nome atual, então não fica em cache
+    root = obj
+    while "_" in root.name and root.parent is not None:
+        root = root.parent
+    return root
+
+
+def hierarchy_subtree(objects, include_roots=True):
+    children = _hierarchy_children()
+    result = set(objects) if include_roots else set()
+    stack = [obj.as_pointer() for obj in objects]
+    seen = set(stack)
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            key = child.as_pointer()
+            if key not in seen:
+                seen.add(key)
+                result.add(child)
+                stack.append(key)
+    return result
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    if _hierarchy["children"] is None:
+        return
+    parents = _hierarchy["parents"]
+    if len(bpy.data.objects) != len(parents):
+        invalidate_hierarchy()
+        return
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            obj = update.id.original
+            parent = obj.parent.as_pointer() if obj.parent else None
+            if parents.get(obj.as_pointer(), 0) != parent:
+                invalidate_hierarchy()
+                return
+
+
+@persistent
+def _on_reload(*args):
+    # Load e undo recriam os IDs: os ponteiros guardados deixam de valer
+    invalidate_hierarchy()
+
+
+def _handlers():
+    return (
+        (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+        (bpy.app.handlers.load_post, _on_reload),
+        (bpy.app.handlers.undo_post, _on_reload),
+        (bpy.app.handlers.redo_post, _on_reload),
+    )
+
+
+def install_handlers():
+    # Um handler só, seja qual for o add-on que montou o índice
+    for handlers, function in _handlers():
+        if function not in handlers:
+            handlers.append(function)
+
+
+def remove_handlers():
+    # Chamado no unregister de qualquer um dos dois: sem handler o índice não
+    # pode ficar, e o próximo uso o monta de novo e reinstala o handler.
+    # Pelo nome também, para pegar as funções de um reload do script
+    for handlers, function in _handlers():
+        for old in list(handlers):
+            if getattr(old, "__module__", None) == __name__ and old.__name__ == function.__name__:
+                handlers.remove(old)
+    invalidate_hierarchy()
@@ -0,0 +1,295 @@
+import collections
+import json
+import statistics
+import time
+import tracemalloc
+
+import bpy
+import bmesh
+
+bl_info = {
+    "name": "Profiler RL",
+    "author": "Renan Lacerda",
+    "version": (1, 0),
+    "blender": (2, 80, 0),
+    "location": "View3D > Sidebar > Profiler RL",
+    "description": "Mede o custo do execute dos operadores do Bevel RL e do QuickMenu",
+    "category": "Development",
+}
+
+# Módulos cujos operadores são medidos (nome do arquivo do add-on)
+_TARGETS = ("bevel_rl", "QuickMenuRL", "quick_menu_rl")
+
+# Desligado, nenhum execute é embrulhado e bpy.ops não é tocado: custo zero.
+# Ligado, cada execute vira um registro no buffer circular
+_state = {
+    "memory": True,
+    "records": collections.deque(maxlen=200),
+    "stack": [],
+    "tracing": False,
+}
+
+# Classe que define o execute -> execute original; classe de bpy.ops -> __call__ original
+_wrapped = {}
+_ops_call = {}
+
+
+# MEDIÇÃO
+def _mesh_counts(context):
+    # Vértices/edges/faces das malhas em edição ou selecionadas; malhas
+    # compartilhadas contam uma vez. Em Edit Mode lê o BMesh de edição
+    objects = context.objects_in_mode if context.mode == 'EDIT_MESH' else context.selected_objects
+    counts = [0, 0, 0]
+    seen = set()
+    for obj in objects or ():
+        if obj.type != 'MESH' or obj.data.name_full in seen:
+            continue
+        seen.add(obj.data.name_full)
+        if obj.mode == 'EDIT':
+            bm = bmesh.from_edit_mesh(obj.data)
+            sizes = (len(bm.verts), len(bm.edges), len(bm.faces))
+        else:
+            sizes = (len(obj.data.vertices), len(obj.data.edges), len(obj.data.polygons))
+        for i, size in enumerate(sizes):
+            counts[i] += size
+    return counts
+
+
+def _profile(execute, op, context):
+    stack = _state["stack"]
+    outer = not stack
+    memory = outer and _state["memory"]
+    record = {
+        "operator": type(op).bl_idname,
+        "mode": str(getattr(op, "mode", "")),
+        "ops": 0,
+        "mode_set": 0,
+    }
+    stack.append(record)
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _state["tracing"] = True
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+
+    t_start = time.perf_counter()
+    try:
+        result = execute(op, context)
+    finally:
+        record["wall_ms"] = (time.perf_counter() - t_start) * 1000.0
+        if memory:
+            record["peak_kb"] = (tracemalloc.get_traced_memory()[1] - base) / 1024.0
+        stack.pop()
+        if stack:
+            # O que a chamada interna fez também conta para quem chamou
+            stack[-1]["ops"] += record["ops"]
+            stack[-1]["mode_set"] += record["mode_set"]
+        try:
+            record["verts"], record["edges"], record["faces"] = _mesh_counts(context)
+        except (AttributeError, ReferenceError, ValueError):
+            pass
+        record["time"] = time.time()
+        _state["records"].append(record)
+    record["result"] = sorted(result) if isinstance(result, set) else str(result)
+    return result
+
+
+def _wrap(execute):
+    def execute_profiled(self, context):
+        return _profile(execute, self, context)
+    execute_profiled.__wrapped__ = execute
+    return execute_profiled
+
+
+def _count_ops(call):
+    def call_counted(self, *args, **kwargs):
+        stack = _state["stack"]
+        if stack:
+            stack[-1]["ops"] += 1
+            if self.idname_py() == "object.mode_set":
+                stack[-1]["mode_set"] += 1
+        return call(self, *args, **kwargs)
+    return call_counted
+
+
+def _target_classes():
+    # Operadores dos add-ons alvo, inclusive os que ainda não foram registrados
+    pending = list(bpy.types.Operator.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.__module__.rsplit(".", 1)[-1] in _TARGETS:
+            yield cls
+
+
+def _install():
+    for cls in _target_classes():
+        # Embrulha a classe que define o execute (o mixin do Bevel RL, por
+        # exemplo), uma vez só, para as subclasses herdarem a versão medida
+        owner = next((base for base in cls.__mro__ if "execute" in base.__dict__), None)
+        if owner is None or owner is bpy.types.Operator or owner in _wrapped:
+            continue
+        _wrapped[owner] = owner.__dict__["execute"]
+        owner.execute = _wrap(owner.execute)
+    ops_class = type(bpy.ops.object.mode_set)
+    if ops_class not in _ops_call:
+        _ops_call[ops_class] = ops_class.__call__
+        ops_class.__call__ = _count_ops(ops_class.__call__)
+
+
+def _uninstall():
+    for owner, execute in _wrapped.items():
+        owner.execute = execute
+    _wrapped.clear()
+    for ops_class, call in _ops_call.items():
+        ops_class.__call__ = call
+    _ops_call.clear()
+    _state["stack"].clear()
+    if _state["tracing"]:
+        tracemalloc.stop()
+        _state["tracing"] = False
+
+
+def summary():
+    # (operador, modo) -> chamadas, mediana e máximo, do mais lento para o mais rápido
+    groups = {}
+    for record in _state["records"]:
+        groups.setdefault((record["operator"], record["mode"]), []).append(record["wall_ms"])
+    rows = [
+        dict(operator=operator, mode=mode, calls=len(times),
+             median_ms=statistics.median(times), max_ms=max(times))
+        for (operator, mode), times in groups.items()
+    ]
+    rows.sort(key=lambda row: row["max_ms"], reverse=True)
+    return rows
+
+
+# PROPRIEDADES
+def _enabled_update(self, context):
+    if self.enabled:
+        _install()
+    else:
+        _uninstall()
+
+
+def _memory_update(self, context):
+    _state["memory"] = self.memory
+    if not self.memory and _state["tracing"]:
+        tracemalloc.stop()
+        _state["tracing"] = False
+
+
+def _capacity_update(self, context):
+    _state["records"] = collections.deque(_state["records"], maxlen=self.capacity)
+
+
+class ProfilerRL_Properties(bpy.types.PropertyGroup):
+    enabled: bpy.props.BoolProperty(
+        name="Medir", default=False, update=_enabled_update,
+        description="Embrulha o execute dos operadores do Bevel RL e do QuickMenu",
+    )
+    memory: bpy.props.BoolProperty(
+        name="Memória (tracemalloc)", default=True, update=_memory_update,
+        description="Pico de alocação Python de cada chamada; deixa as chamadas mais lentas",
+    )
+    capacity: bpy.props.IntProperty(
+        name="Últimas Chamadas", default=200, min=10, max=100000, update=_capacity_update,
+    )
+    rows: bpy.props.IntProperty(name="Linhas", default=8, min=1, max=50)
+
+
+# OPERADORES
+class ProfilerRL_OT_dump(bpy.types.Operator):
+    bl_idname = "profiler_rl.dump"
+    bl_label = "Salvar JSON"
+    bl_description = "Salva as chamadas medidas e o resumo em JSON"
+
+    filepath: bpy.props.StringProperty(subtype='FILE_PATH', default="//profiler_rl.json")
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        path = bpy.path.abspath(self.filepath)
+        with open(path, "w") as f:
+            json.dump({"records": list(_state["records"]), "summary": summary()}, f, indent=1)
+        self.report({'INFO'}, "%d chamadas em %s" % (len(_state["records"]), path))
+        return {'FINISHED'}
+
+
+class ProfilerRL_OT_clear(bpy.types.Operator):
+    bl_idname = "profiler_rl.clear"
+    bl_label = "Limpar"
+
+    def execute(self, context):
+        _state["records"].clear()
+        return {'FINISHED'}
+
+
+# PAINEL
+class ProfilerRL_PT_panel(bpy.types.Panel):
+    bl_label = "Profiler RL"
+    bl_idname = "VIEW3D_PT_profiler_rl"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Profiler RL"
+
+    def draw(self, context):
+        layout = self.layout
+        props = context.window_manager.profiler_rl
+
+        layout.prop(props, "enabled")
+        layout.prop(props, "memory")
+        layout.prop(props, "capacity")
+        layout.prop(props, "rows")
+        row = layout.row(align=True)
+        row.operator("profiler_rl.dump", icon='EXPORT')
+        row.operator("profiler_rl.clear", icon='TRASH')
+
+        rows = summary()[:props.rows]
+        if not rows:
+            layout.label(text="Nenhuma chamada medida")
+            return
+        box = layout.box()
+        for row in rows:
+            name = row["operator"] + (" > " + row["mode"] if row["mode"] else "")
+            split = box.split(factor=0.6)
+            split.label(text=name)
+            split.label(text="%.1f / %.1f ms ×%d" % (row["median_ms"], row["max_ms"], row["calls"]))
+
+        last = _state["records"][-1]
+        col = layout.column(align=True)
+        col.label(text="Última: %s %.1f ms" % (last["operator"], last["wall_ms"]))
+        col.label(text="bpy.ops %d, mode_set %d" % (last["ops"], last["mode_set"]))
+        if "verts" in last:
+            col.label(text="%d v / %d e / %d f" % (last["verts"], last["edges"], last["faces"]))
+        if "peak_kb" in last:
+            col.label(text="Pico Python %.0f KB" % last["peak_kb"])
+
+
+classes = (
+    ProfilerRL_Properties,
+    ProfilerRL_OT_dump,
+    ProfilerRL_OT_clear,
+    ProfilerRL_PT_panel,
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+    bpy.types.WindowManager.profiler_rl = bpy.props.PointerProperty(type=ProfilerRL_Properties)
+
+
+def unregister():
+    _uninstall()
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
+    del bpy.types.WindowManager.profiler_rl
+
+
+if __name__ == "__main__":
+    register()
@@ -8,11 +8,49 @@ bl_info = {
     "category": "3D View"
 }
 
+import os
+import sys
+import time
+
 import bpy
 import bmesh
-import mathutils
 from bpy.app.handlers import persistent 
-from mathutils import Vector, Matrix
+
+# CARGA SOB DEMANDA
+# O register só registra as classes e os atalhos. Os módulos que o Blender
+# ainda não carregou entram no primeiro operador que precisa deles e os
+# handlers da hierarquia (em centroid_rl) quando o índice é montado. O tempo do register e o
+# da primeira chamada, carga incluída, ficam em _timings e são impressos uma vez
+np = None
+centroid_rl = None
+_timings = {}
+
+def _load_modules():
+    global np, centroid_rl
+    if np is not None:
+        return
+    # centroid_rl.py fica na mesma pasta e é compartilhado com o QuickMenuRL.py,
+    # inclusive o índice de hierarquia
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if folder not in sys.path:
+        sys.path.append(folder)
+    import centroid_rl
+    import numpy as np
+
+def _first_use(execute):
+    # Mede a primeira chamada de um operador que carrega os módulos
+    def execute_timed(self, context):
+        if "first_use" in _timings:
+            return execute(self, context)
+        t_start = time.perf_counter()
+        result = execute(self, context)
+        _timings["first_use"] = (time.perf_counter() - t_start) * 1000.0
+        _report_timings()
+        return result
+    return execute_timed
+
+def _report_timings():
+    print("QuickMenuRL: register %.1f ms, primeiro uso %.1f ms" % (_timings.get("register", 0.0), _timings.get("first_use", 0.0)))
 
 class QuickMenuRL_MT_main(bpy.types.Menu):
     bl_label = "QuickMenuRL"
@@ -77,6 +115,45 @@ class QuickMenuRL_MT_main(bpy.types.Menu):
             layout.operator("uv.average_islands_scale",text="Average Islands Scale",icon="MOD_ARRAY")
             operation=layout.operator("uv.pack_islands",text="Pack Islands",icon="IMAGE_PLANE")
 
+# CENTRO DA SELEÇÃO
+def _pivot_objects(context):
+    # Em Edit Mode, todos os objetos em edição; fora dele, as malhas selecionadas
+    objects = context.objects_in_mode if context.mode == 'EDIT_MESH' else context.selected_objects
+    return [o for o in objects if o.type == 'MESH']
+
+# ORDEM DOS MATERIAIS
+def _material_order(mesh):
+    # Permutação estável das faces por material_index, lida em lote;
+    # None se a malha já está em ordem
+    n = len(mesh.polygons)
+    material = np.empty(n, dtype=np.intc)
+    mesh.polygons.foreach_get("material_index", material)
+    if n < 2 or np.all(material[1:] >= material[:-1]):
+        return None
+    return np.argsort(material, kind='stable')
+
+def _apply_face_order(obj, order):
+    # Reordena as faces numa passada só pela BMesh, no modo em que o objeto está
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    rank = rank.tolist()
+
+    if obj.mode == 'EDIT':
+        bm = bmesh.from_edit_mesh(obj.data)
+    else:
+        bm = bmesh.new()
+        bm.from_mesh(obj.data)
+    bm.faces.index_update()
+    bm.faces.sort(key=lambda f: rank[f.index])
+    bm.faces.index_update()
+
+    if obj.mode == 'EDIT':
+        bmesh.update_edit_mesh(obj.data, loop_triangles=True, destructive=True)
+    else:
+        bm.to_mesh(obj.data)
+        bm.free()
+        obj.data.update()
+
 # OPERADORES
 class QuickMenuRL_OT_toggle_wireframe(bpy.types.Operator):
     bl_idname = "object.toggle_wireframe"
@@ -125,22 +202,40 @@ class QuickMenuRL_OT_set_pivot_to_active_area(bpy.types.Operator):
     bl_idname = "object.set_pivot_to_active_area"
     bl_label = "Pivot to Active Area"
 
+    @_first_use
     def execute(self, context):
-        bpy.ops.view3d.snap_cursor_to_selected()
+        _load_modules()
+        location = centroid_rl.vertex_centroid(_pivot_objects(context))
+        if location is not None:
+            context.scene.cursor.location = location
         bpy.context.scene.tool_settings.transform_pivot_point = 'CURSOR'
         bpy.context.scene.tool_settings.snap_target = 'ACTIVE'
         return {'FINISHED'}
 class QuickMenuRL_OT_set_pivot_to_object_center(bpy.types.Operator):
     bl_idname = "object.set_pivot_to_object_center"
     bl_label = "Pivot to Object Center"
+    bl_options = {'REGISTER', 'UNDO'}
 
+    center: bpy.props.EnumProperty(
+        name="Center",
+        items=(
+            ('BOUNDS', "Bounds", "Centro da caixa envolvente (bound_box)"),
+            ('MEDIAN', "Median", "Média de todos os vértices"),
+        ),
+        default='BOUNDS',
+    )
+
+    @_first_use
     def execute(self, context):
-        bpy.ops.object.mode_set(mode='EDIT')
-        bpy.ops.mesh.select_all(action='SELECT')
-        bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="BOUNDING_BOX_CENTER"
-        bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
-        bpy.ops.view3d.snap_cursor_to_selected()
-        bpy.ops.object.mode_set(mode='OBJECT')
+        # Sem trocar de modo nem mexer na seleção de vértices
+        _load_modules()
+        objects = _pivot_objects(context)
+        if self.center == 'BOUNDS':
+            location = centroid_rl.bounds_center(objects)
+        else:
+            location = centroid_rl.vertex_centroid(objects, selected_only=False)
+        if location is not None:
+            context.scene.cursor.location = location
         bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="CURSOR"
         bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
         return {'FINISHED'}
@@ -148,33 +243,43 @@ class QuickMenuRL_OT_set_pivot_to_object_point(bpy.types.Operator):
     bl_idname = "object.set_pivot_to_object_point"
     bl_label = "Pivot to Object Point"
 
+    @_first_use
     def execute(self, context):
-        bpy.ops.object.mode_set(mode='EDIT')
-        obj = bpy.context.active_object
-        bm = bmesh.from_edit_mesh(obj.data)
-        v = [v.co for v in bm.verts if v.select]
-
-        if(len(v)>0):
-            loc = obj.matrix_world @ (sum(v, Vector()) / len(v))
-            bpy.context.scene.cursor.location = loc
-        bpy.ops.object.mode_set(mode='OBJECT')
-        cursorPosition=bpy.context.scene.cursor.location
+        _load_modules()
+        # Como antes, o operador termina em Object Mode. Sair do Edit Mode
+        # primeiro grava as malhas uma vez só; a seleção é lida delas em lote
+        objects = _pivot_objects(context)
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        location = centroid_rl.vertex_centroid(objects)
+        if location is not None:
+            context.scene.cursor.location = location
         bpy.data.scenes["Scene"].tool_settings.transform_pivot_point="CURSOR"
         bpy.data.scenes["Scene"].tool_settings.snap_target="CENTER"
-        bpy.context.scene.cursor.location=cursorPosition
         return {'FINISHED'}
 class QuickMenuRL_OT_fix_materials_order(bpy.types.Operator):
     bl_idname = "object.fix_materials_order"
     bl_label = "Fix Materials Order"
+    bl_options = {'REGISTER', 'UNDO'}
 
+    @_first_use
     def execute(self, context):
-        for obj in bpy.context.selected_objects:
-            bpy.ops.object.mode_set(mode='OBJECT')
-            bpy.ops.object.select_all(action='DESELECT')
-            bpy.context.view_layer.objects.active=obj
-            bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.mesh.select_all(action='SELECT')
-            bpy.ops.mesh.sort_elements(type='MATERIAL', elements={'FACE'})
+        # Sem trocar de modo nem de seleção: cada malha é ordenada uma vez,
+        # mesmo se compartilhada por duplicatas linkadas, e só se preciso
+        _load_modules()
+        done = set()
+        fixed = 0
+        for obj in context.selected_objects:
+            if obj.type != 'MESH' or obj.data.as_pointer() in done:
+                continue
+            done.add(obj.data.as_pointer())
+            if obj.mode == 'EDIT':
+                obj.update_from_editmode()
+            order = _material_order(obj.data)
+            if order is not None:
+                _apply_face_order(obj, order)
+                fixed += 1
+        self.report({'INFO'}, "%d malhas ordenadas, %d já em ordem" % (fixed, len(done) - fixed))
         return {'FINISHED'}
 class QuickMenuRL_OT_link_materials(bpy.types.Operator):
     bl_idname = "object.link_materials"
@@ -194,17 +299,27 @@ class QuickMenuRL_OT_set_custom_orientation(bpy.types.Operator):
 class QuickMenuRL_OT_select_object_group(bpy.types.Operator):
     bl_idname = "object.select_object_group"
     bl_label = "Select Object Group"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    children: bpy.props.BoolProperty(name="Children", description="Seleciona também toda a hierarquia abaixo da raiz", default=False)
+
+    @classmethod
+    def poll(cls, context):
+        return context.active_object is not None
 
+    @_first_use
     def execute(self, context):
-        top = context.active_object
-        bpy.ops.object.select_all(action='DESELECT')
-
-        while top:
-            if "_" not in top.name: break
-            elif top.parent: top = top.parent
-            else: break
-        top.select_set(True)
-        context.view_layer.objects.active = top  
+        _load_modules()
+        top = centroid_rl.hierarchy_root(context.active_object)
+        selection = centroid_rl.hierarchy_subtree([top]) if self.children else {top}
+        for obj in context.selected_objects:
+            if obj not in selection:
+                obj.select_set(False)
+        view_layer = context.view_layer
+        for obj in selection:
+            if obj.visible_get(view_layer=view_layer) and not obj.hide_select:
+                obj.select_set(True)
+        view_layer.objects.active = top
         return {'FINISHED'}
 
 # ABRIR MENU
@@ -236,6 +351,7 @@ classes = [
 ]
 
 def register():
+    t_start = time.perf_counter()
     for cls in classes:
         bpy.utils.register_class(cls)
     wm = bpy.context.window_manager
@@ -253,10 +369,13 @@ def register():
         kmi = km.keymap_items.new('wm.call_menu', type='Q', value='PRESS')
         kmi.properties.name = "QUICKMENURL_MT_main"
         addon_keymaps.append((km, kmi))
+    _timings["register"] = (time.perf_counter() - t_start) * 1000.0
 
 def unregister():
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
+    if centroid_rl is not None:
+        centroid_rl.remove_handlers()
     # Remove atalho
     for km, kmi in addon_keymaps:
         km.keymap_items.remove(kmi)